@@ -0,0 +1,111 @@
+import os
+import asyncio
+import threading
+import time
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))
+AUTH_MAX_PENDING = int(os.getenv("AUTH_MAX_PENDING", "32"))
+# bcrypt cost factor for new hashes; verification uses the cost stored in the hash
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+class AuthQueueFull(Exception):
+    """Raised when more password operations are pending than the pool accepts."""
+
+def _hash_password(password, rounds):
+    started = time.time()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    return hashed, started, time.time()
+
+def _check_password(password, hashed):
+    started = time.time()
+    ok = bcrypt.checkpw(password, hashed)
+    return ok, started, time.time()
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt in a dedicated, size-limited process pool so login storms
+    cannot occupy the threads serving score traffic.
+
+    At most `max_pending` operations may be queued or running; beyond that
+    AuthQueueFull is raised (the API answers 429).
+    """
+    def __init__(self, workers=AUTH_WORKERS, rounds=BCRYPT_ROUNDS, max_pending=AUTH_MAX_PENDING):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.timings = {
+            op: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "queue_wait_seconds": 0.0, "max_queue_wait_seconds": 0.0}
+            for op in ("hash", "verify")
+        }
+
+    def _get_executor(self):
+        # Created lazily so importing the app does not fork workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def _run(self, op, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise AuthQueueFull(f"{self.pending} password operations pending")
+            self.pending += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+        wait = max(0.0, started - submitted)
+        latency = finished - started
+        with self._lock:
+            t = self.timings[op]
+            t["count"] += 1
+            t["total_seconds"] += latency
+            t["max_seconds"] = max(t["max_seconds"], latency)
+            t["queue_wait_seconds"] += wait
+            t["max_queue_wait_seconds"] = max(t["max_queue_wait_seconds"], wait)
+        return result
+
+    async def hash_password(self, password):
+        hashed = await self._run("hash", _hash_password, password.encode(), self.rounds)
+        return hashed.decode()
+
+    async def check_password(self, password, password_hash):
+        return await self._run("verify", _check_password, password.encode(), password_hash.encode())
+
+    def stats(self):
+        with self._lock:
+            ops = {}
+            for op, t in self.timings.items():
+                count = t["count"]
+                ops[op] = {
+                    "count": count,
+                    "avg_ms": round(t["total_seconds"] / count * 1000, 1) if count else 0.0,
+                    "max_ms": round(t["max_seconds"] * 1000, 1),
+                    "avg_queue_wait_ms": round(t["queue_wait_seconds"] / count * 1000, 1) if count else 0.0,
+                    "max_queue_wait_ms": round(t["max_queue_wait_seconds"] * 1000, 1)
+                }
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "operations": ops
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -1,43 +1,757 @@
+import numpy as np
 import pandas as pd
 import os
-from .supabase_client import get_supabase
+import io
+import time
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .snapshot_store import SNAPSHOT_DIR, save_snapshot, load_snapshot
+from .metrics import record_table_load
 
-def load_data():
+# PostgREST caps un-ranged selects (Supabase default: 1000 rows), so every
+# table is read in explicit pages.
+PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+MAX_WORKERS = int(os.getenv("SUPABASE_LOAD_WORKERS", "4"))
+# Threads that block on Supabase round trips for the async API; sized for
+# I/O waits, separate from the event loop's default executor
+IO_WORKERS = int(os.getenv("SUPABASE_IO_WORKERS", "32"))
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="supabase-io")
+
+# Only the columns the engine and dashboards read. review_text stays: burst
+# and short-spam detection work on it.
+TABLE_COLUMNS = {
+    "sellers": ["seller_id", "seller_name", "account_age_days", "avg_response_time_hours", "created_at"],
+    "orders": ["order_id", "seller_id", "order_date", "delivery_days", "on_time_delivery", "returned"],
+    "reviews": ["review_id", "seller_id", "rating", "review_text", "review_date"],
+}
+
+# Primary keys, used for a stable page order
+TABLE_KEYS = {
+    "sellers": "seller_id",
+    "orders": "order_id",
+    "reviews": "review_id",
+}
+
+# High-water mark column per table for incremental refreshes. These are
+# business dates, not insertion order: see IncrementalLoader for what a
+# delta cannot see and FULL_RELOAD_INTERVAL for how that is bounded.
+WATERMARK_COLUMNS = {
+    "sellers": "created_at",
+    "orders": "order_date",
+    "reviews": "review_date",
+}
+
+# TEXT columns must not be type-inferred from CSV ("1" would become 1)
+TEXT_COLUMNS = {"seller_id", "seller_name", "order_id", "review_id", "review_text", "order_date", "review_date", "created_at"}
+
+# Offline mode never contacts Supabase: data comes from the local snapshot,
+# or from data/*.csv when there is no snapshot yet
+OFFLINE = os.getenv("TRUSTSCORE_OFFLINE", "0").lower() in ("1", "true", "yes")
+# Minimum seconds between snapshot writes after delta refreshes
+SNAPSHOT_SAVE_INTERVAL = float(os.getenv("SNAPSHOT_SAVE_INTERVAL", "300"))
+# Maximum age of the last full reload before a refresh forces another one;
+# bounds how long rows the deltas cannot see stay missing (0 disables)
+FULL_RELOAD_INTERVAL = float(os.getenv("FULL_RELOAD_INTERVAL", "3600"))
+# Score from per-seller order aggregates computed by the data source instead
+# of keeping every order row resident
+ORDER_AGGREGATE_PUSHDOWN = os.getenv("ORDER_AGGREGATE_PUSHDOWN", "0").lower() in ("1", "true", "yes")
+# Score from the seller_stats view alone (one row per seller, no order or
+# review rows); see score_seller_stats in trust_engine
+SCORE_FROM_SELLER_STATS = os.getenv("SCORE_FROM_SELLER_STATS", "0").lower() in ("1", "true", "yes")
+
+# Cast the resident tables to compact dtypes (see compact_frame)
+COMPACT_FRAMES = os.getenv("COMPACT_FRAMES", "1").lower() in ("1", "true", "yes")
+
+# Resident columns nothing reads once the fetched rows' watermarks are taken.
+# reviews.date is the datetime copy of review_date kept by older snapshots.
+DROPPED_COLUMNS = {
+    "sellers": ["created_at"],
+    "orders": ["order_date"],
+    "reviews": ["date"],
+}
+# Repeated strings: a few thousand sellers and templated review texts
+CATEGORY_COLUMNS = {"seller_id", "review_text"}
+# TEXT primary keys, stored as int32 while every value is a plain integer
+ID_COLUMNS = {"order_id", "review_id"}
+FLAG_COLUMNS = {"on_time_delivery", "returned"}
+SMALL_INT_COLUMNS = {"rating": np.int16, "delivery_days": np.int16}
+DATE_COLUMNS = {"order_date", "review_date"}
+
+# Rows/sec etc. of the most recent load_data() call, per table
+last_load_stats = {}
+
+def _parse_csv_page(table, text):
+    columns = TABLE_COLUMNS[table]
+    if not text or not text.strip():
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(
+        io.StringIO(text),
+        dtype={c: str for c in columns if c in TEXT_COLUMNS},
+        true_values=["t", "true"],
+        false_values=["f", "false"],
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+def _apply_filters(query, filters):
+    # filters: [(method, column, value)], e.g. ("gte", "order_date", "2024-05-01")
+    for method, column, value in filters or ():
+        query = getattr(query, method)(column, value)
+    return query
+
+def _count_rows(supabase, table, filters=None):
+    query = supabase.table(table).select(TABLE_KEYS[table], count="exact", head=True)
+    return _apply_filters(query, filters).execute().count
+
+def _change_probe(supabase, table):
     """
-    Load sellers, orders, and reviews from Supabase.
-    Returns a dictionary of pandas DataFrames.
+    (estimated row count, newest watermark) of a table in one round trip:
+    an ORDER BY watermark DESC LIMIT 1 on its index instead of an exact
+    COUNT(*) scan. The estimate comes from planner statistics on large
+    tables, so the newest watermark is what reliably moves on new rows.
     """
-    supabase = get_supabase()
-    
-    try:
-        # Fetch Sellers
-        sellers_res = supabase.table("sellers").select("*").execute()
-        sellers_df = pd.DataFrame(sellers_res.data)
-        
-        # Fetch Orders
-        orders_res = supabase.table("orders").select("*").execute()
-        orders_df = pd.DataFrame(orders_res.data)
-        
-        # Fetch Reviews
-        reviews_res = supabase.table("reviews").select("*").execute()
-        reviews_df = pd.DataFrame(reviews_res.data)
-        
-        if sellers_df.empty or orders_df.empty or reviews_df.empty:
-            print("Warning: One or more tables are empty in Supabase")
-            
-        # Ensure correct types
-        if not reviews_df.empty:
-            reviews_df['date'] = pd.to_datetime(reviews_df['review_date'])
-            
-        if not orders_df.empty:
-            orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
-            
+    column = WATERMARK_COLUMNS[table]
+    res = (
+        supabase.table(table).select(column, count="estimated")
+        .not_.is_(column, "null").order(column, desc=True).limit(1).execute()
+    )
+    return res.count, res.data[0][column] if res.data else None
+
+def _fetch_page(supabase, table, start, page_size, filters=None):
+    """Fetch rows [start, start + page_size) as CSV and parse them column-wise."""
+    query = supabase.table(table).select(",".join(TABLE_COLUMNS[table]))
+    res = (
+        _apply_filters(query, filters)
+        .order(TABLE_KEYS[table])
+        .range(start, start + page_size - 1)
+        .csv()
+        .execute()
+    )
+    return _parse_csv_page(table, res.data)
+
+def _fetch_unknown_size(supabase, table, page_size, filters=None):
+    # Count not available: walk pages until a short one comes back
+    pages = []
+    start = 0
+    while True:
+        page = _fetch_page(supabase, table, start, page_size, filters)
+        pages.append(page)
+        if len(page) < page_size:
+            return pages
+        start += page_size
+
+def record_load_stats(stats):
+    """Replace last_load_stats with one load's per-table stats and export them to /metrics."""
+    last_load_stats.clear()
+    last_load_stats.update(stats)
+    record_table_load(stats)
+
+def fetch_tables(supabase, tables=("sellers", "orders", "reviews"), page_size=None, max_workers=None, filters=None, record=True, count=True):
+    """
+    Fetch the given tables page by page on a bounded thread pool.
+    `filters` optionally maps a table to [(method, column, value)] pushed down to PostgREST.
+    With count=False the row count round trip is skipped and pages are read
+    until a short one arrives (cheaper for small filtered reads).
+    Returns {table: DataFrame}; with record=True per-table throughput goes to last_load_stats.
+    """
+    frames, stats = _fetch_tables(supabase, tables, page_size, max_workers, filters, count)
+    if record:
+        _record_supabase_load(stats)
+    return frames
+
+def _record_supabase_load(stats):
+    record_load_stats(stats)
+    for table, s in stats.items():
+        print(f"Loaded {table}: {s['rows']} rows in {s['pages']} pages, {s['seconds']}s ({s['rows_per_sec']} rows/sec)")
+
+def _fetch_tables(supabase, tables, page_size, max_workers, filters, count):
+    page_size = page_size or PAGE_SIZE
+    max_workers = max_workers or MAX_WORKERS
+    filters = filters or {}
+    frames = {}
+    stats = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        started = {table: time.perf_counter() for table in tables}
+        counts = {table: pool.submit(_count_rows, supabase, table, filters.get(table)) for table in tables} if count else {}
+
+        page_futures = {}
+        for table in tables:
+            total = counts[table].result() if count else None
+            if total is None:
+                page_futures[table] = [pool.submit(_fetch_unknown_size, supabase, table, page_size, filters.get(table))]
+            else:
+                page_futures[table] = [
+                    pool.submit(_fetch_page, supabase, table, start, page_size, filters.get(table))
+                    for start in range(0, max(total, 1), page_size)
+                ]
+
+        for table in tables:
+            pages = []
+            for future in page_futures[table]:
+                result = future.result()
+                pages.extend(result if isinstance(result, list) else [result])
+            df = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+            elapsed = time.perf_counter() - started[table]
+            frames[table] = df
+            stats[table] = {
+                "rows": len(df),
+                "pages": len(pages),
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(len(df) / elapsed, 1) if elapsed > 0 else 0.0
+            }
+    return frames, stats
+
+async def fetch_tables_async(supabase, tables=("sellers", "orders", "reviews"), page_size=None, max_workers=None, filters=None, record=True, count=True):
+    """
+    Async variant of fetch_tables: each table is fetched on the I/O executor
+    and the tables are awaited concurrently with asyncio.gather. Stats are
+    recorded once for the whole load.
+    """
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_io_executor, _fetch_tables, supabase, (table,), page_size, max_workers, filters, count)
+        for table in tables
+    ))
+    frames = {table: df for result, _ in results for table, df in result.items()}
+    if record:
+        _record_supabase_load({table: s for _, stats in results for table, s in stats.items()})
+    return frames
+
+def normalize_frames(frames):
+    """Convert date columns in place; safe to call on full tables or deltas."""
+    reviews_df = frames.get("reviews")
+    if reviews_df is not None and not reviews_df.empty:
+        reviews_df['review_date'] = pd.to_datetime(reviews_df['review_date'])
+
+    orders_df = frames.get("orders")
+    if orders_df is not None and not orders_df.empty:
+        orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
+    return frames
+
+def _int32_ids(series):
+    """
+    `series` as int32 when every id is the canonical text of an integer in
+    int32 range ("42", not "042" or "4.2"), so the ids read back unchanged;
+    otherwise None.
+    """
+    if series.empty or series.hasnans:
+        return None
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = _int32_ids(pd.Series(series.cat.categories))
+        if categories is None:
+            return None
+        return pd.Series(categories.to_numpy()[series.cat.codes.to_numpy()], index=series.index, name=series.name)
+    if pd.api.types.is_integer_dtype(series):
+        numbers = series
+    elif not pd.api.types.is_string_dtype(series):
+        return None
+    else:
+        try:
+            numbers = series.astype(np.int64)
+        except (ValueError, TypeError, OverflowError):
+            return None
+        # Canonical text has exactly as many characters as the number has
+        # digits (plus the sign): rules out "042", "+42", " 42" and "4_2"
+        values = numbers.to_numpy()
+        digits = np.floor(np.log10(np.maximum(np.abs(values), 1))).astype(np.int64) + 1 + (values < 0)
+        if not (series.str.len().to_numpy() == digits).all():
+            return None
+    info = np.iinfo(np.int32)
+    if numbers.min() < info.min or numbers.max() > info.max:
+        return None
+    return numbers.astype(np.int32)
+
+def _compact_column(column, series):
+    if column in CATEGORY_COLUMNS:
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+    if column in ID_COLUMNS:
+        ids = _int32_ids(series)
+        return series if ids is None else ids
+    if series.hasnans:
+        # NaN has no integer representation; such columns stay as loaded
+        return series
+    if column in FLAG_COLUMNS and (pd.api.types.is_bool_dtype(series) or series.isin((0, 1)).all()):
+        return series.astype(np.uint8)
+    if column in SMALL_INT_COLUMNS and pd.api.types.is_numeric_dtype(series):
+        dtype = SMALL_INT_COLUMNS[column]
+        info = np.iinfo(dtype)
+        if (series % 1 == 0).all() and series.min() >= info.min and series.max() <= info.max:
+            return series.astype(dtype)
+        return series
+    if column in DATE_COLUMNS and not pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(series)
+    return series
+
+def compact_frame(table, df):
+    """
+    One resident table with compact dtypes: categorical seller_id and
+    review_text, int32 ids, uint8 flags, int16 ratings, datetime64 dates,
+    and DROPPED_COLUMNS removed. Values are unchanged, so scores are too.
+    Idempotent, and works the same on full tables and deltas.
+    """
+    dropped = set(DROPPED_COLUMNS.get(table, ()))
+    columns = {column: _compact_column(column, df[column]) for column in df.columns if column not in dropped}
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def _memory_report(before, after):
+    """{table: {rows, bytes_before, bytes_after}} for a compaction pass."""
+    return {
+        table: {"rows": len(after[table]), "bytes_before": frame_bytes(before[table]), "bytes_after": frame_bytes(after[table])}
+        for table in after
+    }
+
+def _align_ids(resident, delta):
+    """Fall back to text ids on both sides when only one of them compacted to int32."""
+    for column in ID_COLUMNS & set(resident.columns) & set(delta.columns):
+        resident_int = pd.api.types.is_integer_dtype(resident[column])
+        if resident_int != pd.api.types.is_integer_dtype(delta[column]):
+            if resident_int:
+                resident = resident.assign(**{column: resident[column].astype(str)})
+            else:
+                delta = delta.assign(**{column: delta[column].astype(str)})
+    return resident, delta
+
+def _watermark(table, df):
+    """Highest watermark value in `df` as the string PostgREST compares against."""
+    column = WATERMARK_COLUMNS[table]
+    if df.empty or column not in df.columns:
+        return None
+    values = df[column].dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.max().strftime('%Y-%m-%d')
+    # ISO dates/timestamps order lexically
+    return str(values.max())
+
+def _concat_rows(resident, delta):
+    """Append delta rows, keeping categorical (snapshot-backed) columns categorical."""
+    delta = delta.copy()
+    for column in resident.columns:
+        if isinstance(resident[column].dtype, pd.CategoricalDtype) and column in delta.columns:
+            categories = resident[column].cat.categories
+            new_values = pd.Index(delta[column].dropna().unique()).difference(categories)
+            if len(new_values):
+                resident = resident.assign(**{column: resident[column].cat.add_categories(new_values)})
+                categories = resident[column].cat.categories
+            delta[column] = pd.Categorical(delta[column], categories=categories)
+    return pd.concat([resident, delta], ignore_index=True)
+
+class IncrementalLoader:
+    """
+    Keeps the three tables resident and refreshes them by delta.
+
+    Each table has a high-water mark on WATERMARK_COLUMNS. A refresh fetches
+    rows with watermark >= the stored mark (the boundary day is re-read so
+    rows added later that day are not missed) and upserts them by primary key.
+    A full reload happens on first use, on demand, when the projected
+    columns change, or when a delta fetch fails.
+
+    The watermarks are business dates (order_date, review_date, created_at),
+    not insertion order, so a delta does not see:
+      - rows inserted late with a date before the stored mark (back-dated
+        orders, imported reviews),
+      - rows edited in place without moving their watermark (e.g. a
+        seller's response time),
+      - deleted rows.
+    All three are only picked up by a full reload, which is forced once the
+    last one is older than FULL_RELOAD_INTERVAL seconds. The snapshot keeps
+    that timestamp, so a warm start does not reset the clock.
+
+    The resident tables are persisted to a local snapshot (snapshot_store)
+    after full reloads and, at most every SNAPSHOT_SAVE_INTERVAL seconds,
+    after deltas. A fresh process maps that snapshot and only fetches the
+    delta. In offline mode the snapshot or data/*.csv is the only source.
+    """
+    def __init__(self, source=None, tables=None, snapshot_path=SNAPSHOT_DIR, offline=OFFLINE):
+        self.source = source
+        self.tables = tuple(tables or TABLE_COLUMNS)
+        self.snapshot_path = snapshot_path
+        self.offline = offline
+        self.snapshot_info = {}
+        self._last_save = 0.0
+        self._save_lock = threading.Lock()
+        self.frames = None
+        self.watermarks = {}
+        self.schema = None
+        self.full_reload_requested = False
+        self.full_loaded_at = 0.0
+        # Result of the last persist_review_flags and the change_signature()
+        # it was taken at (SCORE_FROM_SELLER_STATS)
+        self.review_flags = None
+        self.stats_signature = None
+        self.last_refresh = {}
+        # Resident bytes per table before/after compaction, from the last full load
+        self.memory = {}
+        # Bumped whenever the resident tables change. last_changes describes
+        # the latest step: {"from", "to", "tables"}, where tables maps each
+        # table a delta touched to {"removed": replaced resident rows,
+        # "added": fetched rows}, or is None after a full load.
+        self.generation = 0
+        self.last_changes = None
+        self._lock = threading.RLock()
+        self._async_lock = None
+
+    def request_full_reload(self):
+        self.full_reload_requested = True
+
+    def _source(self):
+        from .data_sources import get_data_source
+        return self.source or get_data_source()
+
+    def _schema_signature(self):
+        return {table: tuple(TABLE_COLUMNS[table]) for table in self.tables}
+
+    def _needs_full(self, full):
+        return (
+            full
+            or self.full_reload_requested
+            or self.frames is None
+            or self.schema != self._schema_signature()
+            or (FULL_RELOAD_INTERVAL > 0 and time.time() - self.full_loaded_at >= FULL_RELOAD_INTERVAL)
+        )
+
+    def _delta_filters(self):
+        # Tables without a mark yet (empty so far) are re-read whole
         return {
-            "sellers": sellers_df,
-            "orders": orders_df,
-            "reviews": reviews_df
+            table: [("gte", WATERMARK_COLUMNS[table], mark)]
+            for table, mark in self.watermarks.items()
+            if mark is not None
         }
+
+    def _warm_start(self):
+        """Adopt the on-disk snapshot if it matches the current projection."""
+        if self.frames is not None or not self.snapshot_path:
+            return False
+        try:
+            frames, manifest = load_snapshot(self.snapshot_path)
+        except Exception as e:
+            print(f"Error reading local snapshot: {e}")
+            return False
+        if frames is None:
+            return False
+        schema = {table: tuple(columns) for table, columns in manifest["schema"].items()}
+        if schema != self._schema_signature():
+            print("Local snapshot has a different schema, ignoring it")
+            return False
+        frames = self._compact(frames)
+        with self._lock:
+            self.frames = frames
+            self._changed(None)
+            self.watermarks = manifest["watermarks"]
+            self.schema = schema
+            self._last_save = manifest["created_at"]
+            # Snapshots written before this was recorded count as stale
+            self.full_loaded_at = manifest.get("full_loaded_at") or 0.0
+            self.snapshot_info = {"loaded_from": self.snapshot_path, "created_at": manifest["created_at"]}
+            self.last_refresh = {"mode": "snapshot", "rows": {table: len(df) for table, df in frames.items()}}
+        print(f"Warm start from local snapshot: {self.last_refresh['rows']}")
+        return True
+
+    def _refresh_offline(self, full):
+        with self._lock:
+            if self.frames is not None and not full:
+                return dict(self.frames)
+            self.frames = None
+        if self._warm_start():
+            return dict(self.frames)
+        frames = load_csv_data()
+        return self._apply_full({table: frames[table] for table in self.tables}, persist=False)
+
+    def _changed(self, tables):
+        self.generation += 1
+        self.last_changes = {"from": None if tables is None else self.generation - 1, "to": self.generation, "tables": tables}
+
+    def _compact(self, frames):
+        if not COMPACT_FRAMES:
+            return frames
+        compacted = {table: compact_frame(table, df) for table, df in frames.items()}
+        self.memory = _memory_report(frames, compacted)
+        for table, m in self.memory.items():
+            print(f"Compacted {table}: {m['bytes_before'] / 1e6:.1f} MB -> {m['bytes_after'] / 1e6:.1f} MB ({m['rows']} rows)")
+        return compacted
+
+    def _save(self, frames, watermarks, schema, full_loaded_at):
+        if not self._save_lock.acquire(blocking=False):
+            return  # a save is already running; the next refresh will catch up
+        try:
+            start = time.perf_counter()
+            manifest = save_snapshot(frames, watermarks, schema, self.snapshot_path, full_loaded_at=full_loaded_at)
+            self._last_save = manifest["created_at"]
+            self.snapshot_info = {"saved_to": self.snapshot_path, "created_at": manifest["created_at"], "save_seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            print(f"Error writing local snapshot: {e}")
+        finally:
+            self._save_lock.release()
+
+    def _persist(self, force=False):
+        # Written in the background from the (immutable) resident frames
+        if not self.snapshot_path or self.offline:
+            return
+        if not force and time.time() - self._last_save < SNAPSHOT_SAVE_INTERVAL:
+            return
+        threading.Thread(
+            target=self._save,
+            args=(dict(self.frames), dict(self.watermarks), self._schema_signature(), self.full_loaded_at),
+            daemon=True
+        ).start()
+
+    def refresh(self, full=False):
+        """Return {table: DataFrame}, fetching only what changed since the last call."""
+        if self.offline:
+            return self._refresh_offline(full)
+        if not full:
+            self._warm_start()
+        with self._lock:
+            if not self._needs_full(full):
+                try:
+                    deltas = self._source().fetch_tables(self.tables, filters=self._delta_filters())
+                    return self._apply_delta(deltas)
+                except Exception as e:
+                    print(f"Delta refresh failed, falling back to full reload: {e}")
+            frames = self._source().fetch_tables(self.tables)
+            return self._apply_full(frames)
+
+    async def refresh_async(self, full=False):
+        """
+        Same as refresh(), but the three table fetches run concurrently on the
+        event loop and merging happens in a worker thread.
+        """
+        if self.offline:
+            return await asyncio.to_thread(self._refresh_offline, full)
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if not full:
+                await asyncio.to_thread(self._warm_start)
+            if not self._needs_full(full):
+                try:
+                    deltas = await self._source().fetch_tables_async(self.tables, filters=self._delta_filters())
+                    return await asyncio.to_thread(self._apply_delta, deltas)
+                except Exception as e:
+                    print(f"Delta refresh failed, falling back to full reload: {e}")
+            frames = await self._source().fetch_tables_async(self.tables)
+            return await asyncio.to_thread(self._apply_full, frames)
+
+    def _apply_full(self, frames, persist=True):
+        with self._lock:
+            self.watermarks = {table: _watermark(table, df) for table, df in frames.items()}
+            self.frames = self._compact(normalize_frames(frames))
+            self._changed(None)
+            self.schema = self._schema_signature()
+            self.full_reload_requested = False
+            self.full_loaded_at = time.time()
+            self.last_refresh = {"mode": "full", "rows": {table: len(df) for table, df in self.frames.items()}}
+            if persist:
+                self._persist(force=True)
+            return dict(self.frames)
+
+    def _apply_delta(self, deltas):
+        with self._lock:
+            merged = {}
+            changes = {}
+            for table, delta in deltas.items():
+                mark = _watermark(table, delta)
+                if mark is not None and (self.watermarks.get(table) is None or mark > self.watermarks[table]):
+                    self.watermarks[table] = mark
+                normalize_frames({table: delta})
+                resident = self.frames[table]
+                if delta.empty:
+                    merged[table] = resident
+                    continue
+                if COMPACT_FRAMES:
+                    resident, delta = _align_ids(resident, compact_frame(table, delta))
+                key = TABLE_KEYS[table]
+                # Upsert by primary key: refetched boundary rows replace their old copies
+                replaced = resident[key].isin(delta[key])
+                kept = resident[~replaced] if not resident.empty else resident
+                merged[table] = _concat_rows(kept, delta) if not kept.empty else delta.reset_index(drop=True)
+                changes[table] = {"removed": resident[replaced], "added": delta}
+
+            self.frames = merged
+            self._changed(changes)
+            self.last_refresh = {"mode": "delta", "rows": {table: len(df) for table, df in deltas.items()}}
+            if any(not df.empty for df in deltas.values()):
+                self._persist()
+            return dict(self.frames)
+
+async def load_seller_data_async(seller_id):
+    """
+    Load one seller and only that seller's orders and reviews, filtering on
+    seller_id server-side (indexed in db_setup.sql).
+    Returns the same dict shape as load_data(), or None on error.
+    """
+    seller_filter = [("eq", "seller_id", seller_id)]
+    try:
+        from .data_sources import get_data_source
+        source = get_data_source()
+        frames = await source.fetch_tables_async(
+            filters={table: seller_filter for table in TABLE_COLUMNS},
+            record=False,
+            count=False
+        )
+        if SCORE_FROM_SELLER_STATS:
+            frames["seller_stats"] = await source.fetch_seller_stats_async(seller_id)
+        return normalize_frames(frames)
     except Exception as e:
-        print(f"Error loading data from Supabase: {e}")
+        print(f"Error loading seller {seller_id}: {e}")
         return None
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+def load_csv_data(data_dir=DATA_DIR):
+    """
+    Load the local data/*.csv files in the same shape load_data() returns
+    (TEXT ids, BOOLEAN flags, parsed dates). Used for offline scripts.
+    """
+    frames = {}
+    for table, columns in TABLE_COLUMNS.items():
+        df = pd.read_csv(
+            os.path.join(data_dir, f"{table}.csv"),
+            dtype={c: str for c in columns if c in TEXT_COLUMNS}
+        )
+        frames[table] = df[[c for c in columns if c in df.columns]]
+    orders_df = frames["orders"]
+    for flag in ("on_time_delivery", "returned"):
+        if flag in orders_df.columns:
+            orders_df[flag] = orders_df[flag].astype(bool)
+    return normalize_frames(frames)
+
+_loader = IncrementalLoader(tables=("sellers", "reviews") if ORDER_AGGREGATE_PUSHDOWN else None)
+
+def get_loader():
+    return _loader
+
+def _scoring_data(frames):
+    if any(df.empty for df in frames.values()):
+        print("Warning: One or more tables are empty")
+    data = {
+        "sellers": frames["sellers"],
+        "reviews": frames["reviews"]
+    }
+    if "orders" in frames:
+        data["orders"] = frames["orders"]
+    return data
+
+# Sellers per in.(...) filter when re-reading the reviews of touched sellers
+FLAG_SELLER_BATCH = 200
+
+def persist_review_flags(source, anomaly_model=None, since=None):
+    """
+    Run fake-review detection and store the result in reviews.flagged_fake,
+    which the seller_stats view reads. Must run before
+    refresh_seller_stats(): nothing else writes the column.
+
+    since=None re-detects every review. With a review_date watermark only
+    sellers with reviews at or past it are re-detected, over all of their
+    reviews (bursts and near-duplicates look at neighbouring reviews); their
+    near-duplicate IDF then comes from those sellers' reviews only, until
+    the next full pass. The result carries the new review watermark.
+    """
+    from .model import ReviewAnalyzer
+    start = time.perf_counter()
+    seller_ids = None
+    if since is None:
+        reviews = source.fetch_tables(("reviews",), record=False)["reviews"]
+        watermark = _watermark("reviews", reviews)
+    else:
+        delta = source.fetch_tables(("reviews",), filters={"reviews": [("gte", "review_date", since)]}, record=False, count=False)["reviews"]
+        watermark = max(since, _watermark("reviews", delta) or since)
+        seller_ids = sorted(delta['seller_id'].dropna().astype(str).unique())
+        batches = [
+            source.fetch_tables(("reviews",), filters={"reviews": [("in_", "seller_id", seller_ids[i:i + FLAG_SELLER_BATCH])]}, record=False, count=False)["reviews"]
+            for i in range(0, len(seller_ids), FLAG_SELLER_BATCH)
+        ]
+        reviews = pd.concat(batches, ignore_index=True) if batches else delta
+    reviews = normalize_frames({"reviews": reviews})["reviews"]
+    flagged = ReviewAnalyzer(reviews, anomaly_model=anomaly_model).detect_fake_reviews() if len(reviews) else set()
+    result = source.write_review_flags(flagged, seller_ids) if seller_ids != [] else {"set": 0, "cleared": 0}
+    result.update(
+        mode="full" if since is None else "delta", watermark=watermark,
+        sellers=None if seller_ids is None else len(seller_ids),
+        flagged=len(flagged), reviews=len(reviews), seconds=round(time.perf_counter() - start, 3)
+    )
+    print(f"Review flags ({result['mode']}): {result['flagged']} of {result['reviews']} flagged ({result['set']} set, {result['cleared']} cleared) in {result['seconds']}s")
+    return result
+
+def _sync_seller_stats(source, full=False, anomaly_model=None):
+    """
+    Bring reviews.flagged_fake and the seller_stats view up to date before a
+    SCORE_FROM_SELLER_STATS load. Every review is re-flagged on the first
+    load, on full=True / request_full_reload(), and once FULL_RELOAD_INTERVAL
+    has passed; otherwise only the sellers with reviews past the review
+    watermark, and only when the source's change_signature() moved. The view
+    is refreshed whenever flags were rewritten.
+    """
+    signature = source.change_signature()
+    flags = _loader.review_flags
+    if (
+        full
+        or _loader.full_reload_requested
+        or flags is None
+        or flags["watermark"] is None
+        or (FULL_RELOAD_INTERVAL > 0 and time.time() - _loader.full_loaded_at >= FULL_RELOAD_INTERVAL)
+    ):
+        _loader.review_flags = persist_review_flags(source, anomaly_model)
+        _loader.full_loaded_at = time.time()
+        _loader.full_reload_requested = False
+    elif signature is None or signature != _loader.stats_signature:
+        _loader.review_flags = persist_review_flags(source, anomaly_model, since=flags["watermark"])
+    else:
+        return
+    _loader.stats_signature = signature
+    source.refresh_seller_stats()
+
+def load_data(full=False, anomaly_model=None):
+    """
+    Load sellers, orders, and reviews from the configured data source.
+    After the first call only rows at or past each table's watermark are fetched;
+    pass full=True to force a complete reload.
+    With ORDER_AGGREGATE_PUSHDOWN, "orders" is replaced by "order_stats":
+    one row of order counts and sums per seller, aggregated by the database.
+    With SCORE_FROM_SELLER_STATS only {"seller_stats": ...} is returned,
+    after detection flags (with `anomaly_model`) and the view are brought up
+    to date (see _sync_seller_stats).
+    Otherwise "changes" holds the loader's last_changes for incremental scoring.
+    Returns a dictionary of pandas DataFrames.
+    """
+    try:
+        if SCORE_FROM_SELLER_STATS:
+            source = _loader._source()
+            _sync_seller_stats(source, full, anomaly_model)
+            return {"seller_stats": source.fetch_seller_stats()}
+        data = _scoring_data(_loader.refresh(full=full))
+        data["changes"] = _loader.last_changes
+        if ORDER_AGGREGATE_PUSHDOWN:
+            data["order_stats"] = _loader._source().fetch_seller_aggregates()
+        return data
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
+
+async def load_data_async(full=False, anomaly_model=None):
+    """Async load_data(): tables are fetched concurrently without blocking the event loop."""
+    try:
+        if SCORE_FROM_SELLER_STATS:
+            source = _loader._source()
+            await asyncio.to_thread(_sync_seller_stats, source, full, anomaly_model)
+            return {"seller_stats": await source.fetch_seller_stats_async()}
+        if ORDER_AGGREGATE_PUSHDOWN:
+            frames, order_stats = await asyncio.gather(
+                _loader.refresh_async(full=full),
+                _loader._source().fetch_seller_aggregates_async()
+            )
+            data = _scoring_data(frames)
+            data["order_stats"] = order_stats
+            return data
+        data = _scoring_data(await _loader.refresh_async(full=full))
+        data["changes"] = _loader.last_changes
+        return data
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
@@ -0,0 +1,460 @@
+import pandas as pd
+import os
+import re
+import time
+import sqlite3
+import threading
+import asyncio
+from .supabase_client import get_supabase
+from .data_loader import (
+    TABLE_COLUMNS, TABLE_KEYS, TEXT_COLUMNS, WATERMARK_COLUMNS, DATA_DIR, record_load_stats,
+    fetch_tables, fetch_tables_async, load_csv_data, _change_probe
+)
+
+# Which backend load_data() reads from: "supabase" (default) or "sqlite"
+DATA_SOURCE = os.getenv("DATA_SOURCE", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(DATA_DIR, "trustscore.db"))
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db_setup.sql")
+
+# Columns of fetch_seller_aggregates(), one row per seller
+AGGREGATE_COLUMNS = [
+    "seller_id", "order_count",
+    "on_time_sum", "on_time_count", "returned_sum", "returned_count",
+    "review_count", "rating_count", "rating_sum"
+]
+
+# Columns of the seller_stats view in db_setup.sql
+SELLER_STATS_COLUMNS = [
+    "seller_id", "seller_name", "account_age_days", "avg_response_time_hours",
+    "order_count", "on_time_sum", "on_time_count", "returned_sum", "returned_count",
+    "review_count", "flagged_count", "rating_count", "rating_sum", "rating_sumsq"
+]
+
+# Columns of the seller_scores table (see score_store)
+SELLER_SCORE_COLUMNS = [
+    "seller_id", "seller_name", "trust_score", "confidence_score", "risk_level",
+    "delivery", "return_rate_score", "response", "authenticity", "consistency", "age",
+    "fake_reviews", "real_reviews", "computation_version", "computed_at"
+]
+SCORE_WRITE_BATCH = 1000
+# review_ids per flagged_fake update (sent as an in.(...) filter in the URL)
+FLAG_WRITE_BATCH = 200
+
+class DataSource:
+    """
+    Where sellers, orders and reviews come from.
+    fetch_tables() returns {table: DataFrame} with the TABLE_COLUMNS projection
+    (the same shape for every backend); fetch_seller_aggregates() returns one
+    row per seller with order/review counts and sums computed by the database;
+    fetch_seller_stats() reads the seller_stats view (everything scoring needs).
+    """
+    name = "base"
+
+    def fetch_tables(self, tables=("sellers", "orders", "reviews"), filters=None, record=True, count=True):
+        raise NotImplementedError
+
+    async def fetch_tables_async(self, tables=("sellers", "orders", "reviews"), filters=None, record=True, count=True):
+        return await asyncio.to_thread(self.fetch_tables, tables, filters, record, count)
+
+    def fetch_seller_aggregates(self, seller_id=None):
+        raise NotImplementedError
+
+    async def fetch_seller_aggregates_async(self, seller_id=None):
+        return await asyncio.to_thread(self.fetch_seller_aggregates, seller_id)
+
+    def fetch_seller_stats(self, seller_id=None):
+        raise NotImplementedError
+
+    async def fetch_seller_stats_async(self, seller_id=None):
+        return await asyncio.to_thread(self.fetch_seller_stats, seller_id)
+
+    def refresh_seller_stats(self):
+        """Bring seller_stats up to date (no-op where it is a plain view)."""
+
+    async def refresh_seller_stats_async(self):
+        return await asyncio.to_thread(self.refresh_seller_stats)
+
+    def write_review_flags(self, flagged_ids, seller_ids=None):
+        """
+        Make reviews.flagged_fake true for exactly `flagged_ids`, among the
+        reviews of `seller_ids` (None: every review); only rows whose flag
+        changes are written. Returns {"set": n, "cleared": n}.
+        """
+        raise NotImplementedError
+
+    def fetch_seller_scores(self):
+        """All rows of seller_scores as a DataFrame."""
+        raise NotImplementedError
+
+    def change_signature(self):
+        """
+        Cheap fingerprint of the source tables (row counts etc.); a different
+        value means new data arrived. None when the source cannot tell.
+        """
+        return None
+
+    def next_score_version(self):
+        """A computation version above every one already written, by any process."""
+        raise NotImplementedError
+
+    def write_seller_scores(self, rows, version):
+        """
+        Replace seller_scores with one computation's rows atomically. Returns
+        False, writing nothing, when a newer computation is already there.
+        """
+        raise NotImplementedError
+
+class SupabaseSource(DataSource):
+    """PostgREST-backed source (paged CSV reads, see data_loader.fetch_tables)."""
+    name = "supabase"
+
+    def __init__(self, supabase=None, page_size=None, max_workers=None):
+        self.supabase = supabase
+        self.page_size = page_size
+        self.max_workers = max_workers
+
+    def client(self):
+        return self.supabase or get_supabase()
+
+    def fetch_tables(self, tables=("sellers", "orders", "reviews"), filters=None, record=True, count=True):
+        return fetch_tables(self.client(), tables, self.page_size, self.max_workers, filters, record, count)
+
+    async def fetch_tables_async(self, tables=("sellers", "orders", "reviews"), filters=None, record=True, count=True):
+        return await fetch_tables_async(self.client(), tables, self.page_size, self.max_workers, filters, record, count)
+
+    def _select_pages(self, table, select, seller_id):
+        rows = []
+        page_size = self.page_size or 1000
+        start = 0
+        while True:
+            query = self.client().table(table).select(select)
+            if seller_id is not None:
+                query = query.eq("seller_id", seller_id)
+            page = query.order("seller_id").range(start, start + page_size - 1).execute().data
+            rows.extend(page)
+            if len(page) < page_size:
+                return pd.DataFrame(rows)
+            start += page_size
+
+    def fetch_seller_aggregates(self, seller_id=None):
+        # PostgREST groups by the non-aggregated columns (needs db-aggregates-enabled)
+        orders = self._select_pages("orders", (
+            "seller_id,order_count:order_id.count(),"
+            "on_time_sum:on_time_delivery::int.sum(),on_time_count:on_time_delivery.count(),"
+            "returned_sum:returned::int.sum(),returned_count:returned.count()"
+        ), seller_id)
+        reviews = self._select_pages("reviews", (
+            "seller_id,review_count:review_id.count(),"
+            "rating_count:rating.count(),rating_sum:rating.sum()"
+        ), seller_id)
+        return _combine_aggregates(orders, reviews)
+
+    def fetch_seller_stats(self, seller_id=None):
+        return _seller_stats_frame(self._select_pages("seller_stats", ",".join(SELLER_STATS_COLUMNS), seller_id))
+
+    def refresh_seller_stats(self):
+        self.client().rpc("refresh_seller_stats").execute()
+
+    def _flagged_review_ids(self, seller_ids=None):
+        ids = []
+        page_size = self.page_size or 1000
+        start = 0
+        while True:
+            page = (self.client().table("reviews").select("review_id,seller_id").eq("flagged_fake", True)
+                    .order("review_id").range(start, start + page_size - 1).execute().data)
+            ids.extend(str(row["review_id"]) for row in page if seller_ids is None or str(row["seller_id"]) in seller_ids)
+            if len(page) < page_size:
+                return set(ids)
+            start += page_size
+
+    def write_review_flags(self, flagged_ids, seller_ids=None):
+        flagged_ids = {str(rid) for rid in flagged_ids}
+        current = self._flagged_review_ids(None if seller_ids is None else {str(sid) for sid in seller_ids})
+        changes = {True: sorted(flagged_ids - current), False: sorted(current - flagged_ids)}
+        for value, ids in changes.items():
+            for start in range(0, len(ids), FLAG_WRITE_BATCH):
+                self.client().table("reviews").update({"flagged_fake": value}).in_("review_id", ids[start:start + FLAG_WRITE_BATCH]).execute()
+        return {"set": len(changes[True]), "cleared": len(changes[False])}
+
+    def change_signature(self):
+        return tuple(_change_probe(self.client(), table) for table in TABLE_COLUMNS)
+
+    def fetch_seller_scores(self):
+        return pd.DataFrame(self._select_pages("seller_scores", ",".join(SELLER_SCORE_COLUMNS), None))
+
+    def write_seller_scores(self, rows, version):
+        # Batches go to the staging table; swap_seller_scores (db_setup.sql)
+        # installs the whole computation in one transaction
+        for start in range(0, len(rows), SCORE_WRITE_BATCH):
+            self.client().table("seller_scores_staging").upsert(rows[start:start + SCORE_WRITE_BATCH]).execute()
+        return bool(self.client().rpc("swap_seller_scores", {"p_version": version}).execute().data)
+
+    def next_score_version(self):
+        return int(self.client().rpc("next_score_version").execute().data)
+
+def _seller_stats_frame(df):
+    if df.empty:
+        return pd.DataFrame(columns=SELLER_STATS_COLUMNS)
+    df = df[SELLER_STATS_COLUMNS].copy()
+    df["seller_id"] = df["seller_id"].astype(str)
+    counts = SELLER_STATS_COLUMNS[4:]
+    df[counts] = df[counts].fillna(0).astype("int64")
+    return df.reset_index(drop=True)
+
+def _combine_aggregates(orders, reviews):
+    if orders.empty:
+        orders = pd.DataFrame(columns=["seller_id"])
+    if reviews.empty:
+        reviews = pd.DataFrame(columns=["seller_id"])
+    orders["seller_id"] = orders["seller_id"].astype(str)
+    reviews["seller_id"] = reviews["seller_id"].astype(str)
+    combined = orders.merge(reviews, on="seller_id", how="outer")
+    for column in AGGREGATE_COLUMNS[1:]:
+        if column not in combined.columns:
+            combined[column] = 0
+    counts = AGGREGATE_COLUMNS[1:]
+    combined[counts] = combined[counts].fillna(0).astype("int64")
+    return combined[AGGREGATE_COLUMNS].reset_index(drop=True)
+
+# Postgres-only bits of db_setup.sql and their SQLite spelling
+_SQLITE_REWRITES = [
+    (re.compile(r"TIMESTAMP WITH TIME ZONE", re.I), "TIMESTAMP"),
+    (re.compile(r"DEFAULT NOW\(\)", re.I), "DEFAULT CURRENT_TIMESTAMP"),
+    (re.compile(r"DEFAULT gen_random_uuid\(\)", re.I), "DEFAULT (lower(hex(randomblob(16))))"),
+    # SQLite has no materialized views; a plain view is always fresh
+    (re.compile(r"CREATE MATERIALIZED VIEW", re.I), "CREATE VIEW"),
+]
+_MATERIALIZED_VIEW = re.compile(r"CREATE MATERIALIZED VIEW\s+(?:IF NOT EXISTS\s+)?(\w+)", re.I)
+_INDEX_TARGET = re.compile(r"\sON\s+(\w+)\s*\(", re.I)
+_FILTER_OPS = {"eq": "=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+def sqlite_statements(sql):
+    """
+    Split db_setup.sql into statements SQLite understands: comments dropped,
+    $$-quoted bodies kept whole, and only CREATE TABLE / INDEX / VIEW kept
+    (functions, grants etc. are Postgres-only). Materialized views become
+    plain views, and indexes on them are dropped.
+    """
+    statements = []
+    current = []
+    in_dollar = False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_dollar and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if line.count("$$") % 2 == 1:
+            in_dollar = not in_dollar
+        if not in_dollar and stripped.endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    views = {m.group(1).lower() for m in map(_MATERIALIZED_VIEW.search, statements) if m}
+    kept = []
+    for statement in statements:
+        head = " ".join(statement.split()[:3]).upper()
+        if head.startswith(("CREATE INDEX", "CREATE UNIQUE INDEX")):
+            target = _INDEX_TARGET.search(statement)
+            if target and target.group(1).lower() in views:
+                continue
+        if head.startswith(("CREATE TABLE", "CREATE INDEX", "CREATE VIEW", "CREATE UNIQUE INDEX", "CREATE MATERIALIZED VIEW")):
+            for pattern, replacement in _SQLITE_REWRITES:
+                statement = pattern.sub(replacement, statement)
+            kept.append(statement)
+    return kept
+
+class SQLiteSource(DataSource):
+    """
+    Local SQLite database built from db_setup.sql and seeded from data/*.csv
+    on first use (data_dir=None leaves it empty, e.g. for seed_supabase.py).
+    Lets scoring, benchmarks and the API run without network access.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH, schema_path=SCHEMA_PATH, data_dir=DATA_DIR):
+        self.path = path
+        self.schema_path = schema_path
+        self.data_dir = data_dir
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def connection(self):
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._create_schema(conn)
+                self._conn = conn
+            return self._conn
+
+    def _create_schema(self, conn):
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        with open(self.schema_path) as f:
+            statements = sqlite_statements(f.read())
+        with conn:
+            for statement in statements:
+                conn.execute(statement)
+        if "sellers" not in existing and self.data_dir:
+            self.seed(conn)
+
+    def seed(self, conn):
+        """Insert data/*.csv into the freshly created tables."""
+        start = time.perf_counter()
+        frames = load_csv_data(self.data_dir)
+        rows = {}
+        with conn:
+            for table in ("sellers", "orders", "reviews"):
+                df = frames[table][[c for c in TABLE_COLUMNS[table] if c in frames[table].columns]].copy()
+                for column in df.columns:
+                    if pd.api.types.is_datetime64_any_dtype(df[column]):
+                        df[column] = df[column].dt.strftime("%Y-%m-%d")
+                    elif pd.api.types.is_bool_dtype(df[column]):
+                        df[column] = df[column].astype(int)
+                df.to_sql(table, conn, if_exists="append", index=False)
+                rows[table] = len(df)
+        print(f"Seeded {self.path} from {self.data_dir}: {rows} in {time.perf_counter() - start:.2f}s")
+
+    def _where(self, table, filters):
+        clauses = []
+        params = []
+        for method, column, value in filters or ():
+            if (method not in _FILTER_OPS and method != "in_") or column not in TABLE_COLUMNS[table]:
+                raise ValueError(f"Unsupported filter {method}({column}) on {table}")
+            if method == "in_":
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} {_FILTER_OPS[method]} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _read_table(self, table, filters):
+        columns = TABLE_COLUMNS[table]
+        where, params = self._where(table, filters)
+        sql = f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY {TABLE_KEYS[table]}"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        for column in columns:
+            if column in TEXT_COLUMNS:
+                df[column] = df[column].astype(str).where(df[column].notna(), None)
+        for flag in ("on_time_delivery", "returned"):
+            if flag in df.columns and df[flag].notna().all():
+                df[flag] = df[flag].astype(bool)
+        return df
+
+    def fetch_tables(self, tables=("sellers", "orders", "reviews"), filters=None, record=True, count=True):
+        self.connection()
+        filters = filters or {}
+        frames = {}
+        stats = {}
+        for table in tables:
+            start = time.perf_counter()
+            df = self._read_table(table, filters.get(table))
+            elapsed = time.perf_counter() - start
+            frames[table] = df
+            stats[table] = {
+                "rows": len(df),
+                "pages": 1,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(len(df) / elapsed, 1) if elapsed > 0 else 0.0
+            }
+        if record:
+            record_load_stats(stats)
+            for table, s in stats.items():
+                print(f"Loaded {table}: {s['rows']} rows from SQLite, {s['seconds']}s ({s['rows_per_sec']} rows/sec)")
+        return frames
+
+    def fetch_seller_aggregates(self, seller_id=None):
+        self.connection()
+        where = " WHERE seller_id = ?" if seller_id is not None else ""
+        params = [seller_id] if seller_id is not None else []
+        orders_sql = f"""
+            SELECT seller_id,
+                   COUNT(*) AS order_count,
+                   SUM(on_time_delivery) AS on_time_sum, COUNT(on_time_delivery) AS on_time_count,
+                   SUM(returned) AS returned_sum, COUNT(returned) AS returned_count
+            FROM orders{where} GROUP BY seller_id
+        """
+        reviews_sql = f"""
+            SELECT seller_id,
+                   COUNT(*) AS review_count,
+                   COUNT(rating) AS rating_count, SUM(rating) AS rating_sum
+            FROM reviews{where} GROUP BY seller_id
+        """
+        with self._lock:
+            orders = pd.read_sql_query(orders_sql, self._conn, params=params)
+            reviews = pd.read_sql_query(reviews_sql, self._conn, params=params)
+        return _combine_aggregates(orders, reviews)
+
+    def fetch_seller_stats(self, seller_id=None):
+        self.connection()
+        where = " WHERE seller_id = ?" if seller_id is not None else ""
+        params = [seller_id] if seller_id is not None else []
+        sql = f"SELECT {', '.join(SELLER_STATS_COLUMNS)} FROM seller_stats{where} ORDER BY seller_id"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        return _seller_stats_frame(df)
+
+    def change_signature(self):
+        self.connection()
+        with self._lock:
+            return tuple(
+                self._conn.execute(f"SELECT COUNT(*), MAX({WATERMARK_COLUMNS[table]}) FROM {table}").fetchone()
+                for table in TABLE_COLUMNS
+            )
+
+    def write_review_flags(self, flagged_ids, seller_ids=None):
+        self.connection()
+        scope = ""
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS flagged_reviews (review_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM flagged_reviews")
+            self._conn.executemany("INSERT OR IGNORE INTO flagged_reviews VALUES (?)", [(str(rid),) for rid in flagged_ids])
+            if seller_ids is not None:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS flag_sellers (seller_id TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM flag_sellers")
+                self._conn.executemany("INSERT OR IGNORE INTO flag_sellers VALUES (?)", [(str(sid),) for sid in seller_ids])
+                scope = " AND seller_id IN (SELECT seller_id FROM flag_sellers)"
+            cleared = self._conn.execute(
+                f"UPDATE reviews SET flagged_fake = 0 WHERE flagged_fake AND review_id NOT IN (SELECT review_id FROM flagged_reviews){scope}"
+            ).rowcount
+            flagged = self._conn.execute(
+                f"UPDATE reviews SET flagged_fake = 1 WHERE NOT COALESCE(flagged_fake, 0) AND review_id IN (SELECT review_id FROM flagged_reviews){scope}"
+            ).rowcount
+        return {"set": flagged, "cleared": cleared}
+
+    def fetch_seller_scores(self):
+        self.connection()
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(SELLER_SCORE_COLUMNS)} FROM seller_scores ORDER BY seller_id", self._conn)
+
+    def write_seller_scores(self, rows, version):
+        self.connection()
+        sql = f"INSERT OR REPLACE INTO seller_scores ({', '.join(SELLER_SCORE_COLUMNS)}) VALUES ({', '.join('?' * len(SELLER_SCORE_COLUMNS))})"
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM seller_scores WHERE computation_version > ? LIMIT 1", (version,)).fetchone():
+                return False
+            self._conn.executemany(sql, [tuple(row[c] for c in SELLER_SCORE_COLUMNS) for row in rows])
+            self._conn.execute("DELETE FROM seller_scores WHERE computation_version != ?", (version,))
+        return True
+
+    def next_score_version(self):
+        # No sequences in SQLite: one above the installed computation. Two
+        # processes may draw the same number; the write is still atomic.
+        self.connection()
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(computation_version), 0) + 1 FROM seller_scores").fetchone()[0]
+
+_source = None
+_source_lock = threading.Lock()
+
+def get_data_source():
+    """The process-wide DataSource selected by DATA_SOURCE."""
+    global _source
+    with _source_lock:
+        if _source is None:
+            if DATA_SOURCE == "sqlite":
+                _source = SQLiteSource()
+            elif DATA_SOURCE == "supabase":
+                _source = SupabaseSource()
+            else:
+                raise ValueError(f"Unknown DATA_SOURCE {DATA_SOURCE!r} (expected 'supabase' or 'sqlite')")
+        return _source
@@ -0,0 +1,376 @@
+import threading
+import numpy as np
+import pandas as pd
+from .trust_engine import TrustScoreEngine
+
+# Per-seller running aggregates. Counts and flag sums are integers; rating
+# sums are float64 but hold integer ratings exactly (far below 2**53).
+COUNT_FIELDS = (
+    "order_count", "on_time_sum", "on_time_count", "returned_sum", "returned_count",
+    "delivered_count", "delivered_on_time", "review_count", "valid_count", "rating_count"
+)
+SUM_FIELDS = ("rating_sum", "rating_sumsq")
+REVIEW_COLUMNS = ("review_id", "seller_id", "rating", "review_text", "review_date")
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+def _same_rows(removed, added, key):
+    """True when `added` only re-delivers `removed` unchanged (the boundary re-read of a delta)."""
+    if len(removed) != len(added):
+        return False
+    if removed.empty:
+        return True
+    columns = [c for c in REVIEW_COLUMNS if c in removed.columns and c in added.columns and c != key]
+    old = removed.set_index(key)[columns].sort_index()
+    new = added.set_index(key)[columns].sort_index()
+    if not old.index.equals(new.index):
+        return False
+    for column in columns:
+        a, b = old[column].astype(object), new[column].astype(object)
+        if not ((a == b) | (a.isna() & b.isna())).all():
+            return False
+    return True
+
+class IncrementalScoreEngine:
+    """
+    TrustScoreEngine.calculate_scores() kept up to date event by event.
+
+    Each seller owns one slot in a set of NumPy arrays holding its order
+    count, on-time and returned sums (with their non-null counts), the
+    delivered/on-time counts of the delivery_days fallback, and its total
+    and valid review counts plus the valid ratings' count, sum and sum of
+    squares. Adding or removing an order or review touches one slot, and
+    only that seller's score is recomposed.
+
+    The means are the same integer sums over the same counts the batch
+    path divides, so delivery and return scores match it bit for bit. The
+    rating std is rebuilt as (n*sumsq - sum**2) / (n*(n-1)), which is
+    exact for integer ratings; the batch groupby std can differ from it in
+    the last bits, so results are compared by value after rounding (see
+    check()).
+
+    Which reviews are suspicious comes from ReviewAnalyzer: bursts and
+    near-duplicate clusters depend on neighbouring reviews, so callers pass
+    the flag with each review (flag_review() moves a review between valid
+    and suspicious later).
+    """
+    def __init__(self, has_on_time=True, has_delivery_days=True, has_returned=True, capacity=1024):
+        self.has_on_time = has_on_time
+        self.has_delivery_days = has_delivery_days
+        self.has_returned = has_returned
+        self.arrays = {name: np.zeros(capacity, dtype=np.int64) for name in COUNT_FIELDS}
+        self.arrays.update({name: np.zeros(capacity, dtype=np.float64) for name in SUM_FIELDS})
+        self.slots = {}
+        # seller_id -> seller record, in the order the batch path scores them
+        self.sellers = {}
+        self._scores = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        # Loader generation these aggregates reflect (see IncrementalLoader.last_changes)
+        self.generation = None
+        self.applied_changes = 0
+        self.applied_rows = 0
+
+    @classmethod
+    def from_engine(cls, engine, generation=None):
+        """Aggregates of a batch engine's data, using its suspicious review set."""
+        orders = engine.orders
+        if engine.order_stats is not None:
+            raise ValueError("Incremental scoring needs order rows, not pushed-down order_stats")
+        live = cls(
+            has_on_time='on_time_delivery' in orders.columns,
+            has_delivery_days='delivery_days' in orders.columns,
+            has_returned='returned' in orders.columns,
+            capacity=max(1024, len(engine.sellers))
+        )
+        live.upsert_sellers(engine.sellers)
+        live.apply_orders(orders)
+        live.apply_reviews(engine.reviews, engine.suspicious_reviews)
+        live.generation = generation
+        return live
+
+    # --- slots ---
+
+    def _slot(self, seller_id):
+        slot = self.slots.get(seller_id)
+        if slot is None:
+            slot = self.slots[seller_id] = len(self.slots)
+            capacity = len(self.arrays["order_count"])
+            if slot >= capacity:
+                for name, array in self.arrays.items():
+                    self.arrays[name] = np.concatenate([array, np.zeros(capacity, dtype=array.dtype)])
+        return slot
+
+    def _row_slots(self, seller_ids):
+        codes, uniques = pd.factorize(seller_ids)
+        slots = np.array([self._slot(s) for s in uniques], dtype=np.int64)
+        self._dirty.update(uniques)
+        return slots[codes]
+
+    def _add(self, name, slots, values):
+        array = self.arrays[name]
+        array += np.bincount(slots, weights=values, minlength=len(array)).astype(array.dtype)
+
+    # --- batches of rows ---
+
+    def upsert_sellers(self, sellers):
+        """Add or replace seller records; replaced sellers move to the end, as in the loader's upsert."""
+        with self._lock:
+            for record in sellers.to_dict(orient="records"):
+                sid = record['seller_id']
+                previous = self.sellers.pop(sid, None)
+                self.sellers[sid] = record
+                if record != previous:
+                    self._dirty.add(sid)
+
+    def apply_orders(self, orders, sign=1):
+        """Add (sign=1) or subtract (sign=-1) order rows."""
+        if orders is None or orders.empty:
+            return
+        with self._lock:
+            slots = self._row_slots(orders['seller_id'])
+            self._add("order_count", slots, np.full(len(orders), sign))
+            if self.has_on_time:
+                flags = pd.to_numeric(orders['on_time_delivery'], errors='coerce')
+                self._add("on_time_sum", slots, sign * flags.fillna(0).to_numpy(dtype=np.int64))
+                self._add("on_time_count", slots, sign * flags.notna().to_numpy(dtype=np.int64))
+            if self.has_delivery_days:
+                days = orders['delivery_days']
+                delivered = days > 0  # assume 0 is cancelled
+                on_time = delivered & (days <= 5)
+                self._add("delivered_count", slots, sign * delivered.to_numpy(dtype=np.int64))
+                self._add("delivered_on_time", slots, sign * on_time.to_numpy(dtype=np.int64))
+            if self.has_returned:
+                flags = pd.to_numeric(orders['returned'], errors='coerce')
+                self._add("returned_sum", slots, sign * flags.fillna(0).to_numpy(dtype=np.int64))
+                self._add("returned_count", slots, sign * flags.notna().to_numpy(dtype=np.int64))
+            self.applied_rows += len(orders)
+
+    def apply_reviews(self, reviews, suspicious=(), sign=1):
+        """Add (sign=1) or subtract (sign=-1) review rows; `suspicious` holds flagged review_ids."""
+        if reviews is None or reviews.empty or 'seller_id' not in reviews.columns:
+            return
+        with self._lock:
+            slots = self._row_slots(reviews['seller_id'])
+            valid = ~reviews['review_id'].isin(suspicious).to_numpy()
+            ratings = pd.to_numeric(reviews['rating'], errors='coerce').to_numpy(dtype=np.float64)
+            rated = valid & ~np.isnan(ratings)
+            ratings = np.where(rated, ratings, 0.0)
+            self._add("review_count", slots, np.full(len(reviews), sign))
+            self._add("valid_count", slots, sign * valid.astype(np.int64))
+            self._add("rating_count", slots, sign * rated.astype(np.int64))
+            self._add("rating_sum", slots, sign * ratings)
+            self._add("rating_sumsq", slots, sign * ratings * ratings)
+            self.applied_rows += len(reviews)
+
+    # --- single events, O(1) ---
+
+    def add_order(self, seller_id, on_time_delivery=None, returned=None, delivery_days=None, sign=1):
+        with self._lock:
+            slot = self._slot(seller_id)
+            a = self.arrays
+            a["order_count"][slot] += sign
+            if self.has_on_time and on_time_delivery is not None:
+                a["on_time_sum"][slot] += sign * int(on_time_delivery)
+                a["on_time_count"][slot] += sign
+            if self.has_delivery_days and delivery_days is not None and delivery_days > 0:
+                a["delivered_count"][slot] += sign
+                a["delivered_on_time"][slot] += sign * int(delivery_days <= 5)
+            if self.has_returned and returned is not None:
+                a["returned_sum"][slot] += sign * int(returned)
+                a["returned_count"][slot] += sign
+            self._dirty.add(seller_id)
+            self.applied_rows += 1
+
+    def remove_order(self, seller_id, on_time_delivery=None, returned=None, delivery_days=None):
+        self.add_order(seller_id, on_time_delivery, returned, delivery_days, sign=-1)
+
+    def _valid_rating(self, slot, rating, sign):
+        a = self.arrays
+        a["valid_count"][slot] += sign
+        if rating is not None and not pd.isna(rating):
+            a["rating_count"][slot] += sign
+            a["rating_sum"][slot] += sign * float(rating)
+            a["rating_sumsq"][slot] += sign * float(rating) * float(rating)
+
+    def add_review(self, seller_id, rating, suspicious=False, sign=1):
+        with self._lock:
+            slot = self._slot(seller_id)
+            self.arrays["review_count"][slot] += sign
+            if not suspicious:
+                self._valid_rating(slot, rating, sign)
+            self._dirty.add(seller_id)
+            self.applied_rows += 1
+
+    def remove_review(self, seller_id, rating, suspicious=False):
+        self.add_review(seller_id, rating, suspicious, sign=-1)
+
+    def flag_review(self, seller_id, rating, suspicious=True):
+        """Move one of the seller's reviews from valid to suspicious (or back)."""
+        with self._lock:
+            self._valid_rating(self._slot(seller_id), rating, -1 if suspicious else 1)
+            self._dirty.add(seller_id)
+
+    # --- loader deltas ---
+
+    def can_apply(self, changes):
+        """
+        Whether a loader change set (IncrementalLoader.last_changes) can be
+        applied here: it must continue from this generation and leave the
+        reviews as they were (new or edited reviews need fake detection,
+        which looks at neighbouring reviews, so they go through a batch run).
+        """
+        if not changes or self.generation is None:
+            return False
+        if changes["to"] == self.generation:
+            return True
+        if changes["from"] != self.generation or changes["tables"] is None:
+            return False
+        reviews = changes["tables"].get("reviews")
+        if reviews is not None and not _same_rows(reviews["removed"], reviews["added"], "review_id"):
+            return False
+        orders = changes["tables"].get("orders")
+        if orders is not None:
+            columns = orders["added"].columns
+            if (
+                ('on_time_delivery' in columns) != self.has_on_time
+                or ('delivery_days' in columns) != self.has_delivery_days
+                or ('returned' in columns) != self.has_returned
+            ):
+                return False
+        return True
+
+    def apply_changes(self, changes):
+        """Apply a change set accepted by can_apply(): replaced rows out, fetched rows in."""
+        with self._lock:
+            if changes["to"] == self.generation:
+                return
+            tables = changes["tables"]
+            if "orders" in tables:
+                self.apply_orders(tables["orders"]["removed"], sign=-1)
+                self.apply_orders(tables["orders"]["added"])
+            if "sellers" in tables:
+                self.upsert_sellers(tables["sellers"]["added"])
+            self.generation = changes["to"]
+            self.applied_changes += 1
+
+    # --- scores ---
+
+    def _compose(self, record):
+        sid = record['seller_id']
+        slot = self.slots.get(sid)
+        if slot is None:
+            values = {name: 0 for name in self.arrays}
+        else:
+            values = {name: array[slot] for name, array in self.arrays.items()}
+        tx_count = int(values["order_count"])
+
+        # Same branches as calculate_scores; means are NumPy divisions of the
+        # same sums the grouped means take
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if tx_count > 0 and self.has_on_time:
+                delivery_score = np.int64(values["on_time_sum"]) / np.int64(values["on_time_count"]) * 100
+            elif tx_count > 0 and self.has_delivery_days:
+                delivered_count, on_time_count = int(values["delivered_count"]), int(values["delivered_on_time"])
+                delivery_score = (on_time_count / delivered_count) * 100 if delivered_count > 0 else 50
+            else:
+                delivery_score = 50
+
+            if tx_count > 0 and self.has_returned:
+                return_score = max(0, 100 - (np.int64(values["returned_sum"]) / np.int64(values["returned_count"]) * 200))
+            else:
+                return_score = 50
+
+        total_reviews = int(values["review_count"])
+        valid_count = int(values["valid_count"])
+        std_dev = None
+        if valid_count > 1:
+            n = float(values["rating_count"])
+            if n > 1:
+                variance = (n * values["rating_sumsq"] - values["rating_sum"] ** 2) / (n * (n - 1))
+                std_dev = np.sqrt(np.float64(max(variance, 0.0)))
+            else:
+                std_dev = np.float64(np.nan)
+
+        return TrustScoreEngine._compose_score(
+            record, delivery_score, return_score,
+            total_reviews, valid_count, std_dev, tx_count
+        )
+
+    def _refresh_dirty(self):
+        for sid in self._dirty:
+            record = self.sellers.get(sid)
+            if record is not None:
+                self._scores[sid] = self._compose(record)
+        self._dirty.clear()
+
+    def score(self, seller_id):
+        """Current score of one seller, or None for an unknown seller."""
+        with self._lock:
+            record = self.sellers.get(seller_id)
+            if record is None:
+                return None
+            if seller_id in self._dirty or seller_id not in self._scores:
+                self._scores[seller_id] = self._compose(record)
+                self._dirty.discard(seller_id)
+            return self._scores[seller_id]
+
+    def scores(self):
+        """All sellers' scores in calculate_scores() order; only changed sellers are recomposed."""
+        with self._lock:
+            self._refresh_dirty()
+            return [self._scores[sid] for sid in self.sellers]
+
+    def check(self, batch_scores, limit=10):
+        """
+        Compare with a batch calculate_scores() result over the same data.
+        Returns {ok, sellers, mismatches, examples}; examples list the first
+        differing fields as {seller_id, field, incremental, batch}.
+        """
+        with self._lock:
+            live = {s['seller_id']: s for s in self.scores()}
+            generation = self.generation
+        examples = []
+        mismatches = 0
+        seen = set()
+        for expected in batch_scores:
+            sid = expected['seller_id']
+            seen.add(sid)
+            actual = live.get(sid)
+            if actual == expected:
+                continue
+            mismatches += 1
+            if len(examples) >= limit:
+                continue
+            if actual is None:
+                examples.append({"seller_id": sid, "field": None, "incremental": None, "batch": "present"})
+                continue
+            for field, value in expected.items():
+                if isinstance(value, dict):
+                    diffs = [(f"{field}.{k}", actual[field].get(k), v) for k, v in value.items() if actual[field].get(k) != v]
+                else:
+                    diffs = [(field, actual.get(field), value)] if actual.get(field) != value else []
+                for name, a, b in diffs:
+                    examples.append({"seller_id": sid, "field": name, "incremental": _plain(a), "batch": _plain(b)})
+        extra = [sid for sid in live if sid not in seen]
+        mismatches += len(extra)
+        for sid in extra[:max(0, limit - len(examples))]:
+            examples.append({"seller_id": sid, "field": None, "incremental": "present", "batch": None})
+        return {
+            "ok": mismatches == 0,
+            "generation": generation,
+            "sellers": len(batch_scores),
+            "mismatches": mismatches,
+            "examples": examples
+        }
+
+    def stats(self):
+        return {
+            "generation": self.generation,
+            "sellers": len(self.sellers),
+            "slots": len(self.slots),
+            "applied_changes": self.applied_changes,
+            "applied_rows": self.applied_rows,
+            "array_bytes": sum(array.nbytes for array in self.arrays.values())
+        }
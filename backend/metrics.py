@@ -0,0 +1,189 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Prometheus' default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being served, for its Server-Timing header.
+# Background work (scheduled recomputes) runs detached and only feeds /metrics.
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+_current_endpoint = contextvars.ContextVar("current_endpoint", default="background")
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+class Gauge(Metric):
+    """Set explicitly, or read from `callback` (returning {label tuple: value}) at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(values.items()) if value is not None
+        ]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}) for key, s in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                labels = _label_text(self.labelnames + ("le",), key + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "trustscore_request_seconds", "API request latency by endpoint", ("endpoint", "method", "status")))
+STAGE_SECONDS = registry.register(Histogram(
+    "trustscore_stage_seconds", "Time spent per pipeline stage (load, detect, score, serialize, ...)", ("endpoint", "stage")))
+ROWS_LOADED = registry.register(Counter(
+    "trustscore_rows_loaded_total", "Rows fetched from the data source per table", ("table",)))
+LAST_LOAD_ROWS = registry.register(Gauge(
+    "trustscore_last_load_rows", "Rows fetched per table by the most recent load", ("table",)))
+
+def record_table_load(stats):
+    """Feed one fetch_tables() result ({table: {"rows": ...}}) into the row metrics."""
+    for table, s in stats.items():
+        ROWS_LOADED.inc(s["rows"], table=table)
+        LAST_LOAD_ROWS.set(s["rows"], table=table)
+
+@contextmanager
+def stage_timer(stage):
+    """Time a pipeline stage into trustscore_stage_seconds and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, endpoint=_current_endpoint.get(), stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def begin_request(endpoint):
+    """Start collecting stage timings for the current request; returns the list."""
+    timings = []
+    _request_timings.set(timings)
+    _current_endpoint.set(endpoint)
+    return timings
+
+def detach_request():
+    """Stop attributing stages to the request whose context this task inherited."""
+    _request_timings.set(None)
+    _current_endpoint.set("background")
+
+def server_timing(timings, total=None):
+    """Server-Timing header value; repeated stages are summed."""
+    merged = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -1,48 +1,50 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.ensemble import IsolationForest 
+from sklearn.preprocessing import normalize
+from scipy import sparse
 import numpy as np
 import pandas as pd
 from collections import Counter
+import joblib
+import os
+import threading
 
 class ReviewAnalyzer:
-    def __init__(self, reviews_df):
+    def __init__(self, reviews_df, near_duplicates=True, anomaly_model=None):
         """
         Initialize with reviews DataFrame.
+        near_duplicates toggles the TF-IDF near-duplicate strategy.
+        anomaly_model is an optional trained ReviewAnomalyModel.
         """
         self.reviews_df = reviews_df
+        self.near_duplicates = near_duplicates
+        self.anomaly_model = anomaly_model
         
     def detect_fake_reviews(self):
         """
         Conservative fake review detection - only flags clear manipulation:
         1. Review bursts (5+ identical reviews same day for same seller)
         2. Very short spam (< 8 chars with 5 stars)
+        3. Near-duplicate clusters (5+ lightly edited copies within a day or two)
+        4. IsolationForest outliers, only when a trained anomaly_model is given
         
         Returns a set of suspicious review IDs.
         """
         suspicious_ids = set()
+        reviews = self.reviews_df
         
         # STRATEGY 1: Review Burst Detection
         # Only flag if seller gets 5+ IDENTICAL reviews on SAME DAY
+        # One groupby over (seller, day, text) for all sellers at once
         try:
-            for seller_id in self.reviews_df['seller_id'].unique():
-                seller_reviews = self.reviews_df[self.reviews_df['seller_id'] == seller_id]
-                
-                if len(seller_reviews) < 5:
-                    continue
-                
-                # Group by date AND review text
-                grouped = seller_reviews.groupby([seller_reviews['date'].dt.date, 'review_text']).size()
-                
-                # Flag if same text appears 5+ times on same date (clear coordinated attack)
-                for (date, text), count in grouped.items():
-                    if count >= 5:
-                        burst_reviews = seller_reviews[
-                            (seller_reviews['date'].dt.date == date) & 
-                            (seller_reviews['review_text'] == text)
-                        ]
-                        for idx in burst_reviews.index:
-                            suspicious_ids.add(self.reviews_df.loc[idx, 'review_id'])
+            burst_size = reviews.groupby(
+                [reviews['seller_id'], reviews['review_date'].dt.normalize(), reviews['review_text']],
+                sort=False
+            )['review_id'].transform('size')
+            
+            # Flag if same text appears 5+ times on same date (clear coordinated attack)
+            suspicious_ids.update(reviews.loc[burst_size >= 5, 'review_id'].tolist())
                         
         except Exception as e:
             print(f"Error in burst detection: {e}")
@@ -50,19 +52,120 @@ class ReviewAnalyzer:
         # STRATEGY 2: Very Short Spam Reviews
         # Single-word 5-star reviews are obviously fake
         try:
-            short_spam = self.reviews_df[
-                (self.reviews_df['review_text'].str.len() < 8) & 
-                (self.reviews_df['rating'] == 5)
-            ]
-            
-            for idx in short_spam.index:
-                suspicious_ids.add(self.reviews_df.loc[idx, 'review_id'])
+            short_spam = (reviews['review_text'].str.len() < 8) & (reviews['rating'] == 5)
+            suspicious_ids.update(reviews.loc[short_spam, 'review_id'].tolist())
                 
         except Exception as e:
             print(f"Error in short review detection: {e}")
+        
+        # STRATEGY 3: Near-Duplicate Templates
+        # Catches templated spam with small edits that exact bursts miss
+        if self.near_duplicates:
+            try:
+                suspicious_ids.update(self.detect_near_duplicates())
+            except Exception as e:
+                print(f"Error in near-duplicate detection: {e}")
+        
+        # STRATEGY 4: Anomaly Model (offline-trained IsolationForest)
+        if self.anomaly_model is not None:
+            try:
+                suspicious_ids.update(self.anomaly_model.detect(self.reviews_df))
+            except Exception as e:
+                print(f"Error in anomaly detection: {e}")
             
         return suspicious_ids
 
+    def detect_near_duplicates(self, window_days=1, threshold=0.6, min_cluster=5, chunk_size=1024):
+        """
+        Flag reviews whose (min_cluster - 1)-th most similar neighbour, among
+        the same seller's reviews in the surrounding day buckets, has TF-IDF
+        cosine similarity >= threshold.
+
+        One sparse TF-IDF matrix is built for all reviews (hashed features, so
+        memory does not grow with vocabulary; identical texts share a row).
+        Similarities are only computed
+        inside (seller, day bucket +/- 1) blocks, in chunk_size x chunk_size
+        sparse products, so no dense all-pairs matrix is ever formed.
+
+        IDF comes from the reviews in this frame, so a frame holding one
+        seller's reviews weighs terms differently than the platform frame.
+        """
+        reviews = self.reviews_df
+        if len(reviews) < min_cluster:
+            return set()
+
+        seller_codes, _ = pd.factorize(reviews['seller_id'])
+        days = reviews['review_date'].dt.normalize()
+        rows = np.flatnonzero((seller_codes >= 0) & days.notna().to_numpy())
+        if len(rows) < min_cluster:
+            return set()
+
+        # Sort rows into (seller, day bucket) blocks
+        day_numbers = days.to_numpy()[rows].astype('datetime64[D]').astype(np.int64)
+        sellers = seller_codes[rows]
+        buckets = day_numbers // window_days
+        order = np.lexsort((buckets, sellers))
+        rows, sellers, buckets = rows[order], sellers[order], buckets[order]
+
+        block_start = np.flatnonzero(np.r_[True, (sellers[1:] != sellers[:-1]) | (buckets[1:] != buckets[:-1])])
+        block_end = np.r_[block_start[1:], len(rows)]
+        sizes = block_end - block_start
+        block_seller = sellers[block_start]
+        block_bucket = buckets[block_start]
+        has_prev = np.r_[False, (block_seller[1:] == block_seller[:-1]) & (block_bucket[1:] == block_bucket[:-1] + 1)]
+        has_next = np.r_[has_prev[1:], False]
+        window_sizes = sizes + np.where(has_prev, np.r_[0, sizes[:-1]], 0) + np.where(has_next, np.r_[sizes[1:], 0], 0)
+
+        # A block can only hold a cluster if its window has enough reviews
+        candidates = np.flatnonzero(window_sizes >= min_cluster)
+        if len(candidates) == 0:
+            return set()
+
+        # TF-IDF over every review, stored as one row per distinct text plus a
+        # row index (templated spam repeats the same strings many times)
+        text_codes, unique_texts = pd.factorize(reviews['review_text'])
+        # Missing text becomes one extra empty document
+        unique_texts = [str(t) for t in unique_texts] + [""]
+        text_codes = np.where(text_codes < 0, len(unique_texts) - 1, text_codes)
+        counts = HashingVectorizer(
+            ngram_range=(1, 2), n_features=2 ** 20, alternate_sign=False, norm=None, dtype=np.float32
+        ).transform(unique_texts)
+        presence = counts.copy()
+        presence.data[:] = 1
+        doc_freq = presence.T @ np.bincount(text_codes, minlength=len(unique_texts))
+        idf = np.log((1 + len(reviews)) / (1 + doc_freq)) + 1  # same smoothing as TfidfVectorizer
+        matrix = normalize(counts @ sparse.diags(idf.astype(np.float32))).tocsr()
+        has_terms = np.diff(matrix.indptr) > 0
+
+        needed = min_cluster - 1
+        flagged = []
+        for block in candidates:
+            lo = block_start[block - 1] if has_prev[block] else block_start[block]
+            hi = block_end[block + 1] if has_next[block] else block_end[block]
+            window = rows[lo:hi]
+            query = np.arange(block_start[block] - lo, block_end[block] - lo)
+
+            # Re-index the window's terms to a compact column space
+            local = matrix[text_codes[window]]
+            terms, local_indices = np.unique(local.indices, return_inverse=True)
+            local = sparse.csr_matrix((local.data, local_indices, local.indptr), shape=(len(window), len(terms)))
+
+            neighbours = np.zeros(len(query), dtype=np.int64)
+            for q in range(0, len(query), chunk_size):
+                query_matrix = local[query[q:q + chunk_size]]
+                for w in range(0, len(window), chunk_size):
+                    sims = (query_matrix @ local[w:w + chunk_size].T).tocsr()
+                    sims.data = (sims.data >= threshold).astype(np.float32)
+                    sims.eliminate_zeros()
+                    neighbours[q:q + chunk_size] += np.diff(sims.indptr)
+
+            # Every non-empty review matches itself
+            neighbours -= has_terms[text_codes[window[query]]]
+            flagged.append(window[query[neighbours >= needed]])
+
+        flagged = np.concatenate(flagged)
+        return set(reviews['review_id'].to_numpy()[flagged].tolist())
+
     def calculate_authenticity_score(self, seller_reviews):
         """
         Calculate authenticity score for a seller based on ratio of flagged fakes vs total reviews.
@@ -72,3 +175,117 @@ class ReviewAnalyzer:
             return 50
             
         return 50
+
+# Feature columns of the review anomaly model, in matrix order
+ANOMALY_FEATURES = ["rating", "text_length", "daily_velocity", "rating_deviation"]
+
+def build_anomaly_features(reviews_df):
+    """
+    Build the anomaly feature matrix with column-wise operations only:
+    rating, review text length, the seller's review count on that day, and
+    the rating's deviation from the seller's mean rating.
+    """
+    ratings = reviews_df['rating'].astype(np.float32)
+    lengths = reviews_df['review_text'].str.len().fillna(0).astype(np.float32)
+    velocity = reviews_df.groupby(
+        [reviews_df['seller_id'], reviews_df['review_date'].dt.normalize()], sort=False
+    )['rating'].transform('size').fillna(1).astype(np.float32)
+    seller_mean = reviews_df.groupby('seller_id', sort=False)['rating'].transform('mean').astype(np.float32)
+
+    return np.column_stack([
+        ratings.to_numpy(),
+        lengths.to_numpy(),
+        velocity.to_numpy(),
+        (ratings - seller_mean).fillna(0).to_numpy(),
+    ])
+
+class ReviewAnomalyModel:
+    """
+    IsolationForest over build_anomaly_features, trained offline
+    (train_anomaly_model.py) and loaded once at startup.
+
+    Predictions are cached by feature vector, not by review: a review's
+    velocity and deviation change as its seller gets new reviews, but the
+    forest's label for a given vector never does. Rows share vectors
+    heavily (small-integer ratings, templated texts), so repeated scoring
+    only runs predict() on vectors not seen before. The cache is reset to
+    the current frame's vectors once it holds more than max_cached.
+    """
+    def __init__(self, forest=None, metadata=None, batch_size=50000, max_cached=500000):
+        self.forest = forest
+        self.metadata = metadata or {}
+        self.batch_size = batch_size
+        self.max_cached = max_cached
+        self.labels = {}
+        # detect() runs on scoring executor threads
+        self._lock = threading.Lock()
+
+    def fit(self, reviews_df, contamination=0.01, n_estimators=100, random_state=42):
+        features = build_anomaly_features(reviews_df)
+        self.forest = IsolationForest(
+            n_estimators=n_estimators,
+            contamination=contamination,
+            random_state=random_state,
+            n_jobs=-1
+        ).fit(features)
+        self.metadata = {
+            "features": ANOMALY_FEATURES,
+            "contamination": contamination,
+            "n_samples": len(features),
+            "trained_at": pd.Timestamp.now(tz="UTC").isoformat()
+        }
+        with self._lock:
+            self.labels = {}
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump({"forest": self.forest, "metadata": self.metadata}, path)
+
+    @classmethod
+    def load(cls, path):
+        payload = joblib.load(path)
+        if payload["metadata"].get("features") != ANOMALY_FEATURES:
+            raise ValueError(f"Anomaly model at {path} was trained on different features")
+        return cls(payload["forest"], payload["metadata"])
+
+    @classmethod
+    def load_if_exists(cls, path):
+        """Load the persisted model, or return None when it is missing or unreadable."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            print(f"Error loading anomaly model from {path}: {e}")
+            return None
+
+    def detect(self, reviews_df):
+        """Return the review ids predicted anomalous, predicting unseen feature vectors in batches."""
+        if self.forest is None or reviews_df.empty:
+            return set()
+
+        features = np.ascontiguousarray(build_anomaly_features(reviews_df), dtype=np.float32)
+        # Group identical rows on their raw bytes (two uint64 words per row);
+        # a hash groupby is much cheaper than np.unique(axis=0)'s lexsort
+        words = features.view(np.uint64)
+        inverse = pd.DataFrame(words).groupby(list(range(words.shape[1])), sort=False).ngroup().to_numpy()
+        _, first = np.unique(inverse, return_index=True)
+        unique = features[first]
+        keys = unique.view(np.dtype((np.void, unique.shape[1] * unique.itemsize))).ravel().tolist()
+        with self._lock:
+            labels = np.array([self.labels.get(key, 0) for key in keys], dtype=np.int8)
+        missing = np.flatnonzero(labels == 0)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            labels[batch] = self.forest.predict(unique[batch])
+
+        with self._lock:
+            if len(missing):
+                self.labels.update(zip(keys, labels.tolist()))
+            if len(self.labels) > self.max_cached:
+                # Drop vectors that have left the resident frame
+                self.labels = dict(zip(keys, labels.tolist()))
+
+        anomalous = labels[inverse] == -1
+        return set(reviews_df['review_id'].to_numpy()[anomalous].tolist())
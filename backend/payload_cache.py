@@ -0,0 +1,160 @@
+import os
+import asyncio
+import gzip
+import json
+import threading
+from fastapi import Response
+from .metrics import stage_timer
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+def dumps(obj):
+    """Serialize to compact JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+def choose_encoding(accept_encoding):
+    """Best supported coding from an Accept-Encoding header, or None for identity."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+class PayloadCache:
+    """
+    Encoded JSON bodies for large, snapshot-derived responses.
+
+    Each payload is keyed by a name and a tag (the score snapshot version).
+    It is serialized once per tag and compressed once per coding; polls
+    are answered from those bytes. A client presenting the current ETag
+    gets a 304 with no body. Only the latest tag of each name is kept.
+
+    `run` executes blocking encode work off the event loop (defaults to
+    asyncio.to_thread).
+    """
+    def __init__(self, run=None):
+        self.run = run
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _encode(self, name, tag, encoding, build):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry["tag"] != tag:
+                entry = self._entries[name] = {"tag": tag, "bodies": {}}
+        # bodies: requested coding -> (bytes, coding actually applied)
+        bodies = entry["bodies"]
+        if None not in bodies:
+            with stage_timer("serialize"):
+                bodies[None] = (dumps(build()), None)
+        if encoding not in bodies:
+            raw = bodies[None][0]
+            if len(raw) < COMPRESS_MIN_BYTES:
+                bodies[encoding] = (raw, None)
+            else:
+                with stage_timer("compress"):
+                    bodies[encoding] = (compress(raw, encoding), encoding)
+        return bodies[encoding]
+
+    async def respond(self, request, name, tag, build, keep=True):
+        """
+        Response for `build()` (called at most once per tag) honouring
+        If-None-Match and Accept-Encoding. keep=False encodes small one-off
+        bodies inline without caching them.
+        """
+        etag = f'W/"{name}-{tag}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if not keep:
+            with stage_timer("serialize"):
+                body = dumps(build())
+            if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+                with stage_timer("compress"):
+                    body = compress(body, encoding)
+            else:
+                encoding = None
+            return self._response(body, encoding, headers)
+
+        entry = self._entries.get(name)
+        cached = entry is not None and entry["tag"] == tag and encoding in entry["bodies"]
+        if cached:
+            self.hits += 1
+            body, encoding = entry["bodies"][encoding]
+        else:
+            self.misses += 1
+            run = self.run or asyncio.to_thread
+            body, encoding = await run(self._encode, name, tag, encoding, build)
+        return self._response(body, encoding, headers)
+
+    def _response(self, body, encoding, headers):
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        with self._lock:
+            sizes = {
+                name: {enc or "identity": len(body) for body, enc in list(entry["bodies"].values())}
+                for name, entry in self._entries.items()
+            }
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "serializer": "orjson" if orjson is not None else "json",
+            "brotli": brotli is not None,
+            "payload_bytes": sizes
+        }
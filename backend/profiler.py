@@ -0,0 +1,186 @@
+import os
+import re
+import asyncio
+import sys
+import threading
+import time
+import random
+from collections import Counter
+
+# Opt-in: nothing is sampled unless PROFILING_ENABLED is set
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+# Fraction of API requests profiled without being asked (0 = only on X-Profile: 1)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_HEADER = "x-profile"
+
+# Top frames of threads that are parked, not working (idle pool workers,
+# the event loop waiting in select, condition waits); left out of profiles
+IDLE_FRAMES = {
+    ("thread.py", "_worker"),
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a daemon thread snapshots every other thread's
+    Python stack each `interval` seconds via sys._current_frames() and
+    counts identical stacks. Nothing is traced, so the profiled code runs
+    at full speed; the cost is one stack walk per thread per sample.
+    """
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(tid, f"thread-{tid}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+def collapsed(stacks):
+    """Brendan Gregg's collapsed-stack format (flamegraph.pl, speedscope)."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class ProfileRing:
+    """
+    Bounded directory of collapsed-stack profiles; the oldest files are
+    deleted once more than `max_files` exist. File names carry the
+    metadata: <timestamp>_<endpoint>_<duration>ms_<samples>s.folded
+    """
+    NAME_RE = re.compile(r"^(\d{8}T\d{6}-\d{6})_([\w.-]+)_(\d+)ms_(\d+)s\.folded$")
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, endpoint, duration, samples, stacks):
+        now = time.time()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"-{int(now * 1e6) % 1_000_000:06d}"
+        slug = re.sub(r"[^\w.-]+", "-", endpoint).strip("-") or "root"
+        name = f"{stamp}_{slug}_{int(duration * 1000)}ms_{samples}s.folded"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(collapsed(stacks))
+            names = self._names()
+            for old in names[:max(0, len(names) - self.max_files)]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+        return name
+
+    def _names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(n for n in os.listdir(self.directory) if self.NAME_RE.match(n))
+
+    def list(self):
+        """Newest first: [{name, endpoint, duration_ms, samples, bytes, created_at}]"""
+        profiles = []
+        for name in reversed(self._names()):
+            match = self.NAME_RE.match(name)
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            profiles.append({
+                "name": name,
+                "endpoint": match.group(2),
+                "duration_ms": int(match.group(3)),
+                "samples": int(match.group(4)),
+                "bytes": stat.st_size,
+                "created_at": stat.st_mtime
+            })
+        return profiles
+
+    def path(self, name):
+        """Path of a stored profile, or None (names outside the ring are rejected)."""
+        if not self.NAME_RE.match(name) or name not in self._names():
+            return None
+        return os.path.join(self.directory, name)
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and runs at most one profile at a
+    time, so concurrent slow requests cannot stack sampler threads.
+    """
+    def __init__(self, enabled=PROFILING_ENABLED, sample_rate=PROFILE_SAMPLE_RATE, ring=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.ring = ring or ProfileRing()
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    def wants(self, request):
+        if not self.enabled or not request.url.path.startswith("/api/"):
+            return False
+        if request.headers.get(PROFILE_HEADER) == "1":
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def profile(self, endpoint, call):
+        """Await call() under the sampler; returns (result, profile name or None)."""
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return await call(), None
+        try:
+            profiler = SamplingProfiler()
+            start = time.perf_counter()
+            profiler.start()
+            try:
+                result = await call()
+            finally:
+                stacks = profiler.stop()
+            duration = time.perf_counter() - start
+            self.profiled += 1
+            name = await asyncio.to_thread(self.ring.save, endpoint, duration, profiler.samples, stacks)
+            return result, name
+        finally:
+            self._busy.release()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "stored": len(self.ring._names())
+        }
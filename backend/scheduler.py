@@ -0,0 +1,135 @@
+import os
+import asyncio
+import time
+
+RECOMPUTE_INTERVAL_SECONDS = float(os.getenv("RECOMPUTE_INTERVAL_SECONDS", os.getenv("SCORE_CACHE_TTL_SECONDS", "60")))
+# How often the data source is probed for new rows (0 disables the probe)
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "10"))
+
+class RecomputeScheduler:
+    """
+    Background recompute loop for the score snapshot (stale-while-revalidate).
+
+    Requests keep being answered from the last completed snapshot while this
+    loop rebuilds it every `interval` seconds, when `probe()` reports a new
+    data fingerprint, or when trigger() is called. Triggers that arrive while
+    a recompute is running collapse into a single follow-up run.
+
+    - `recompute` is an async callable doing the rebuild (ScoreSnapshotCache.refresh).
+    - `probe` is an optional blocking callable returning a data fingerprint.
+    """
+    def __init__(self, recompute, probe=None, interval=RECOMPUTE_INTERVAL_SECONDS, poll_interval=CHANGE_POLL_SECONDS):
+        self.recompute = recompute
+        self.probe = probe
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self._task = None
+        self._oneshot = None
+        self._wake = None
+        self._signature = None
+        self._next_due = 0.0
+
+        self.runs = 0
+        self.failures = 0
+        self.triggers = 0
+        self.coalesced_triggers = 0
+        self.changes_detected = 0
+        self.running = False
+        self.last_run_at = None
+        self.last_run_seconds = 0.0
+        self.last_error = None
+
+    def start(self):
+        """Start the loop on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        for task in (self._task, self._oneshot):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+
+    def trigger(self):
+        """Ask for a recompute soon, without waiting for it."""
+        self.triggers += 1
+        if self._task is not None and not self._task.done():
+            if self._wake.is_set() or self.running:
+                self.coalesced_triggers += 1
+            self._wake.set()
+            return
+        # Loop not started (e.g. no lifespan): run one recompute in the background
+        if self._oneshot is not None and not self._oneshot.done():
+            self.coalesced_triggers += 1
+            return
+        self._oneshot = asyncio.get_running_loop().create_task(self.run_once())
+
+    async def run_once(self):
+        self.running = True
+        start = time.perf_counter()
+        try:
+            await self.recompute()
+            self.runs += 1
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Background recompute failed: {e}")
+        finally:
+            self.running = False
+            self.last_run_at = time.time()
+            self.last_run_seconds = time.perf_counter() - start
+            self._next_due = time.monotonic() + self.interval
+
+    async def _changed(self):
+        if self.probe is None or self.poll_interval <= 0:
+            return False
+        try:
+            signature = await asyncio.to_thread(self.probe)
+        except Exception as e:
+            print(f"Change probe failed: {e}")
+            return False
+        if signature is None:
+            return False
+        changed = self._signature is not None and signature != self._signature
+        self._signature = signature
+        if changed:
+            self.changes_detected += 1
+        return changed
+
+    async def _loop(self):
+        await self._changed()  # baseline fingerprint
+        await self.run_once()
+        while True:
+            timeout = max(0.0, self._next_due - time.monotonic())
+            if self.probe is not None and self.poll_interval > 0:
+                timeout = min(timeout, self.poll_interval)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            due = self._wake.is_set() or time.monotonic() >= self._next_due
+            self._wake.clear()
+            if due or await self._changed():
+                await self.run_once()
+
+    def stats(self):
+        return {
+            "running_loop": self._task is not None and not self._task.done(),
+            "recompute_in_progress": self.running,
+            "interval_seconds": self.interval,
+            "poll_interval_seconds": self.poll_interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "triggers": self.triggers,
+            "coalesced_triggers": self.coalesced_triggers,
+            "changes_detected": self.changes_detected,
+            "last_run_at": self.last_run_at,
+            "last_run_ms": round(self.last_run_seconds * 1000, 1),
+            "last_error": self.last_error
+        }
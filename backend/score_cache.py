@@ -0,0 +1,172 @@
+import os
+import asyncio
+import threading
+import time
+from .trust_engine import platform_benchmarks
+from .seller_index import SellerRowIndex
+
+DEFAULT_TTL_SECONDS = float(os.getenv("SCORE_CACHE_TTL_SECONDS", "60"))
+
+class ScoreSnapshot:
+    """
+    Immutable result of one load + detect + score run.
+    """
+    def __init__(self, version, data, scores, generation):
+        self.version = version
+        self.data = data
+        self.scores = scores
+        self.generation = generation
+        self.built_at = time.time()
+        # Precomputed once per snapshot for point lookups
+        self.scores_by_id = {s['seller_id']: s for s in scores}
+        self.benchmarks = platform_benchmarks(scores)
+        # Built by seller_rows() (the publish hook warms it off the request path)
+        self.rows = None
+        self._rows_lock = threading.Lock()
+
+    def seller_rows(self):
+        """Per-seller row index over this snapshot's data, built on first use."""
+        if self.rows is None:
+            with self._rows_lock:
+                if self.rows is None:
+                    self.rows = SellerRowIndex(self.data)
+        return self.rows
+
+    def age(self):
+        return time.time() - self.built_at
+
+class ScoreSnapshotCache:
+    """
+    Process-wide cache of the latest score snapshot.
+
+    - Snapshots expire after `ttl_seconds` (0 disables caching).
+    - `builder` is an async callable returning (data, scores). Only one
+      rebuild runs at a time; concurrent callers await that build instead
+      of starting their own (single-flight).
+    - invalidate() bumps a generation counter, so a build that started
+      before the invalidation is not served afterwards.
+    - `on_snapshot`, if given, is called (in a worker thread) with every
+      snapshot that gets installed, e.g. to publish it to a read model.
+    """
+    def __init__(self, builder, ttl_seconds=DEFAULT_TTL_SECONDS, on_snapshot=None):
+        self.builder = builder
+        self.ttl_seconds = ttl_seconds
+        self.on_snapshot = on_snapshot
+        self._snapshot = None
+        self._generation = 0
+        self._version = 0
+        self._state_lock = threading.Lock()
+        self._build_lock = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.rebuilds = 0
+        self.rebuild_failures = 0
+        self.last_rebuild_seconds = 0.0
+        self.total_rebuild_seconds = 0.0
+
+    def _is_fresh(self, snapshot):
+        return (
+            snapshot is not None
+            and snapshot.generation == self._generation
+            and snapshot.age() < self.ttl_seconds
+        )
+
+    async def get(self):
+        """Return a fresh snapshot, rebuilding it at most once for concurrent callers."""
+        with self._state_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+        return await self._rebuild(force=False)
+
+    async def refresh(self):
+        """
+        Rebuild even if the snapshot is fresh (background recomputes). A
+        caller arriving while a build is running gets that build's result
+        instead of starting another one.
+        """
+        return await self._rebuild(force=True)
+
+    async def _rebuild(self, force):
+        if self._build_lock is None:
+            self._build_lock = asyncio.Lock()
+        seen_version = self._version
+        async with self._build_lock:
+            # Another caller may have rebuilt while we were waiting
+            with self._state_lock:
+                snapshot = self._snapshot
+                current = snapshot is not None and snapshot.generation == self._generation
+                if current and (self._is_fresh(snapshot) if not force else snapshot.version > seen_version):
+                    self.coalesced += 1
+                    return snapshot
+                generation = self._generation
+
+            start = time.perf_counter()
+            try:
+                data, scores = await self.builder()
+            except Exception:
+                with self._state_lock:
+                    self.rebuild_failures += 1
+                raise
+            # Index building is O(sellers); keep it off the event loop
+            snapshot = await asyncio.to_thread(ScoreSnapshot, self._version + 1, data, scores, generation)
+            elapsed = time.perf_counter() - start
+
+            with self._state_lock:
+                self._version = snapshot.version
+                self.rebuilds += 1
+                self.last_rebuild_seconds = elapsed
+                self.total_rebuild_seconds += elapsed
+                # Invalidated mid-build: the stale build is returned to its caller but not installed
+                installed = generation == self._generation
+                if installed:
+                    self._snapshot = snapshot
+            if installed and self.on_snapshot is not None:
+                await asyncio.to_thread(self.on_snapshot, snapshot)
+            return snapshot
+
+    def building(self):
+        return self._build_lock is not None and self._build_lock.locked()
+
+    def peek(self):
+        """Return the current snapshot if it is fresh, without ever rebuilding."""
+        with self._state_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            return None
+
+    def latest(self):
+        """Return the last built snapshot even if expired (None before the first build)."""
+        with self._state_lock:
+            return self._snapshot
+
+    def invalidate(self):
+        """Drop the current snapshot; the next get() rebuilds."""
+        with self._state_lock:
+            self._generation += 1
+            self._snapshot = None
+            return self._generation
+
+    def stats(self):
+        with self._state_lock:
+            snapshot = self._snapshot
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "version": snapshot.version if snapshot else None,
+                "snapshot_age_seconds": round(snapshot.age(), 3) if snapshot else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "rebuilds": self.rebuilds,
+                "rebuild_failures": self.rebuild_failures,
+                "last_rebuild_ms": round(self.last_rebuild_seconds * 1000, 1),
+                "avg_rebuild_ms": round(self.total_rebuild_seconds / self.rebuilds * 1000, 1) if self.rebuilds else 0.0
+            }
@@ -0,0 +1,154 @@
+import base64
+import json
+import numpy as np
+from .score_store import METRIC_KEYS
+
+RISK_LEVELS = ("Low", "Medium", "High")
+SORT_KEYS = ("trust_score", "confidence_score", *METRIC_KEYS, "fake_reviews", "real_reviews", "name", "seller_id")
+MAX_PAGE_SIZE = 1000
+
+class InvalidQuery(ValueError):
+    """Raised for an unknown sort key, risk level or malformed cursor."""
+
+def encode_cursor(key, value, seller_id):
+    raw = json.dumps([key, value, seller_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, key):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_key, value, seller_id = json.loads(raw)
+    except Exception:
+        raise InvalidQuery("Malformed cursor")
+    if cursor_key != key:
+        raise InvalidQuery("Cursor belongs to a different sort key")
+    return value, seller_id
+
+class SortOrder:
+    """
+    One key's ascending order of the scores, ties broken by seller_id,
+    with the positions in that order belonging to each risk level.
+    """
+    def __init__(self, values, ids, risk):
+        # int32 positions: a dozen of these are kept per snapshot
+        self.order = np.lexsort((ids, values)).astype(np.int32)
+        self.values = values[self.order]
+        self.rank = np.empty(len(self.order), dtype=np.int32)
+        self.rank[self.order] = np.arange(len(self.order), dtype=np.int32)
+        ordered_risk = risk[self.order]
+        self.by_risk = {level: np.flatnonzero(ordered_risk == i) for i, level in enumerate(RISK_LEVELS)}
+
+    def count_below(self, value, seller_id, ids, inclusive):
+        """Number of entries ordered before (value, seller_id), or at it when inclusive."""
+        lo = int(np.searchsorted(self.values, value, side="left"))
+        hi = int(np.searchsorted(self.values, value, side="right"))
+        # Equal values are ordered by seller_id
+        tied = ids[self.order[lo:hi]]
+        return lo + int(np.searchsorted(tied, seller_id, side="right" if inclusive else "left"))
+
+class ScoreIndex:
+    """
+    Query structures over one score computation, built once per snapshot
+    (off the request path, when the computation is published).
+
+    Each sort key gets an ascending (value, seller_id) order plus, per risk
+    level, the positions in that order belonging to the level. Names are
+    kept sorted case-insensitively for prefix search. A page is sliced
+    straight out of these arrays, so "top 50 High-risk by trust_score"
+    costs O(log n + 50) rather than a pass over every seller.
+    """
+    def __init__(self, scores):
+        self.scores = scores
+        n = len(scores)
+        self.ids = np.array([s["seller_id"] for s in scores], dtype=str) if n else np.array([], dtype=str)
+        names = [str(s["name"]).lower() for s in scores]
+        self.risk = np.array([RISK_LEVELS.index(s["risk_level"]) if s["risk_level"] in RISK_LEVELS else -1 for s in scores], dtype=np.int8)
+        self.risk_counts = {level: int((self.risk == i).sum()) for i, level in enumerate(RISK_LEVELS)}
+        self.trust_score_sum = sum(s["trust_score"] for s in scores)
+        self._names = np.array(names, dtype=str) if n else np.array([], dtype=str)
+        self._name_order = np.argsort(self._names, kind="stable")
+        self._sorted_names = self._names[self._name_order]
+        self._orders = {key: SortOrder(self._values(key), self.ids, self.risk) for key in SORT_KEYS}
+
+    def _values(self, key):
+        if key == "name":
+            return self._names
+        if key == "seller_id":
+            return self.ids
+        if key in ("fake_reviews", "real_reviews"):
+            return np.array([s["stats"][key] for s in self.scores], dtype=np.int64)
+        if key in METRIC_KEYS:
+            return np.array([s["metrics"][key] for s in self.scores], dtype=np.float64)
+        return np.array([s[key] for s in self.scores], dtype=np.float64)
+
+    def sort_order(self, key):
+        if key not in self._orders:
+            raise InvalidQuery(f"Unknown sort key '{key}'")
+        return self._orders[key]
+
+    def _prefix_positions(self, order, prefix, risk):
+        """Order positions of sellers whose name starts with prefix (sorted)."""
+        prefix = prefix.lower()
+        lo = int(np.searchsorted(self._sorted_names, prefix, side="left"))
+        hi = int(np.searchsorted(self._sorted_names, prefix + "\U0010ffff", side="left"))
+        matches = self._name_order[lo:hi]
+        if risk is not None:
+            matches = matches[self.risk[matches] == RISK_LEVELS.index(risk)]
+        return np.sort(order.rank[matches])
+
+    def query(self, sort="trust_score", descending=True, risk=None, prefix=None, limit=50, offset=0, cursor=None):
+        """
+        One page of scores. Returns (items, total, next_cursor) where total
+        counts every match and next_cursor is None on the last page. A
+        cursor (from a previous page with the same sort) takes precedence
+        over offset and stays valid across recomputes.
+        """
+        if risk is not None:
+            matched = [level for level in RISK_LEVELS if level.lower() == risk.lower()]
+            if not matched:
+                raise InvalidQuery(f"Unknown risk level '{risk}'")
+            risk = matched[0]
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        order = self.sort_order(sort)
+
+        # positions: indices into order.order, ascending; None means all of them
+        if prefix:
+            positions = self._prefix_positions(order, prefix, risk)
+        elif risk is not None:
+            positions = order.by_risk[risk]
+        else:
+            positions = None
+        total = len(order.order) if positions is None else len(positions)
+
+        if cursor:
+            value, seller_id = decode_cursor(cursor, sort)
+            bound = order.count_below(value, seller_id, self.ids, inclusive=not descending)
+            if positions is None:
+                start, end = (0, bound) if descending else (bound, total)
+            else:
+                cut = int(np.searchsorted(positions, bound, side="left"))
+                start, end = (0, cut) if descending else (cut, total)
+        else:
+            start, end = 0, total
+            offset = max(0, int(offset))
+            if descending:
+                end = max(0, end - offset)
+            else:
+                start = min(total, start + offset)
+
+        if descending:
+            window = slice(max(start, end - limit), end)
+        else:
+            window = slice(start, min(end, start + limit))
+        page = np.arange(window.start, window.stop) if positions is None else positions[window]
+        if descending:
+            page = page[::-1]
+        items = [self.scores[i] for i in order.order[page]]
+
+        more = (window.start > start) if descending else (window.stop < end)
+        next_cursor = None
+        if more and len(page):
+            last = int(page[-1])
+            value = order.values[last]
+            next_cursor = encode_cursor(sort, value.item() if hasattr(value, "item") else value, str(self.ids[order.order[last]]))
+        return items, total, next_cursor
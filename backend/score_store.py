@@ -0,0 +1,171 @@
+import threading
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from .trust_engine import platform_benchmarks
+
+METRIC_KEYS = ["delivery", "return_rate_score", "response", "authenticity", "consistency", "age"]
+
+def score_to_row(score, version, computed_at):
+    """Flatten one engine score dict into a seller_scores row."""
+    row = {
+        "seller_id": score["seller_id"],
+        "seller_name": score["name"],
+        "trust_score": float(score["trust_score"]),
+        "confidence_score": float(score["confidence_score"]),
+        "risk_level": score["risk_level"],
+        "fake_reviews": int(score["stats"]["fake_reviews"]),
+        "real_reviews": int(score["stats"]["real_reviews"]),
+        "computation_version": version,
+        "computed_at": computed_at
+    }
+    for key in METRIC_KEYS:
+        row[key] = float(score["metrics"][key])
+    return row
+
+def row_to_score(row):
+    """Inverse of score_to_row: the dict shape the endpoints return."""
+    return {
+        "seller_id": str(row["seller_id"]),
+        "name": row["seller_name"],
+        "trust_score": float(row["trust_score"]),
+        "confidence_score": float(row["confidence_score"]),
+        "risk_level": row["risk_level"],
+        "metrics": {key: float(row[key]) for key in METRIC_KEYS},
+        "stats": {
+            "fake_reviews": int(row["fake_reviews"]),
+            "real_reviews": int(row["real_reviews"])
+        }
+    }
+
+def _build_index(scores):
+    from .score_index import ScoreIndex
+    return ScoreIndex(scores)
+
+class SellerScoreStore:
+    """
+    Read model of per-seller scores: the seller_scores table plus an
+    in-memory mirror keyed by seller_id.
+
+    publish() swaps in a new computation and writes it to the table in the
+    background. Versions come from the source (next_score_version: a
+    sequence shared by every process on Supabase), and the table is
+    replaced by one computation atomically; load() fills the mirror from the table so a
+    fresh process can answer before its first recompute. Reads never touch
+    raw orders or reviews.
+    """
+    def __init__(self, source=None, persist=True):
+        self.source = source
+        self.persist = persist
+        self.version = 0
+        self.computed_at = None
+        self.scores = []
+        self.by_id = {}
+        self.benchmarks = None
+        self.index = None
+        self.stale = True
+        self.loaded_from_table = False
+        self.last_write = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _source(self):
+        from .data_sources import get_data_source
+        return self.source or get_data_source()
+
+    def get(self, seller_id):
+        return self.by_id.get(seller_id)
+
+    def current(self):
+        """(version, computed_at, scores, index) of one computation, read consistently."""
+        with self._lock:
+            return self.version, self.computed_at, self.scores, self.index
+
+    def age(self):
+        return time.time() - self.computed_at if self.computed_at else None
+
+    def is_stale(self, ttl_seconds):
+        return self.stale or self.computed_at is None or self.age() >= ttl_seconds
+
+    def mark_stale(self):
+        self.stale = True
+
+    def load(self):
+        """Fill the mirror from seller_scores (latest computation only)."""
+        try:
+            df = self._source().fetch_seller_scores()
+        except Exception as e:
+            print(f"Error reading seller_scores: {e}")
+            return False
+        if df.empty:
+            return False
+        version = int(df["computation_version"].max())
+        df = df[df["computation_version"] == version]
+        computed_at = pd.to_datetime(df["computed_at"].iloc[0], utc=True).timestamp()
+        scores = [row_to_score(row) for row in df.to_dict(orient="records")]
+        index = _build_index(scores)
+        with self._lock:
+            if self.version >= version:
+                return False  # a recompute already published something newer
+            self._install(scores, version, computed_at, index)
+            self.loaded_from_table = True
+        print(f"Loaded {len(scores)} seller scores (computation {version}) from seller_scores")
+        return True
+
+    def _install(self, scores, version, computed_at, index):
+        # Swap whole containers so readers never see a half-built mirror
+        self.by_id = {s["seller_id"]: s for s in scores}
+        self.scores = scores
+        self.index = index
+        self.benchmarks = platform_benchmarks(scores)
+        self.version = version
+        self.computed_at = computed_at
+        self.stale = False
+
+    def _next_version(self):
+        """Next version from the source, or None when it cannot be reached."""
+        if not self.persist:
+            return None
+        try:
+            return self._source().next_score_version()
+        except Exception as e:
+            print(f"Error reading the next seller_scores version: {e}")
+            return None
+
+    def publish(self, scores, built_at=None):
+        """Install a recompute's scores and persist them as the next computation version."""
+        computed_at = built_at or time.time()
+        # Normalize to the table's plain types so mirror and table agree
+        rows_scores = [row_to_score(score_to_row(s, 0, None)) for s in scores]
+        index = _build_index(rows_scores)
+        next_version = self._next_version()
+        with self._lock:
+            version = max(self.version + 1, next_version or 0)
+            self._install(rows_scores, version, computed_at, index)
+        if self.persist:
+            threading.Thread(target=self._write, args=(rows_scores, version, computed_at), daemon=True).start()
+        return version
+
+    def _write(self, scores, version, computed_at):
+        stamp = datetime.fromtimestamp(computed_at, tz=timezone.utc).isoformat()
+        rows = [score_to_row(s, version, stamp) for s in scores]
+        with self._write_lock:
+            if version < self.version:
+                return  # superseded before it was written
+            start = time.perf_counter()
+            try:
+                installed = self._source().write_seller_scores(rows, version)
+                self.last_write = {"version": version, "rows": len(rows), "installed": installed, "seconds": round(time.perf_counter() - start, 3)}
+            except Exception as e:
+                self.last_write = {"version": version, "error": str(e)}
+                print(f"Error writing seller_scores: {e}")
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "sellers": len(self.scores),
+            "age_seconds": round(self.age(), 3) if self.computed_at else None,
+            "stale": self.stale,
+            "loaded_from_table": self.loaded_from_table,
+            "last_write": self.last_write
+        }
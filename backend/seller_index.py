@@ -0,0 +1,120 @@
+import base64
+import json
+import os
+import numpy as np
+import pandas as pd
+
+REVIEW_PAGE_SIZE = int(os.getenv("REVIEW_PAGE_SIZE", "50"))
+MAX_REVIEW_PAGE_SIZE = 500
+
+class InvalidCursor(ValueError):
+    """Raised for a reviews cursor that cannot be decoded."""
+
+def encode_review_cursor(date_key, review_id):
+    raw = json.dumps([int(date_key), review_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_review_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_key, review_id = json.loads(raw)
+        return int(date_key), str(review_id)
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+
+class SellerRowIndex:
+    """
+    seller_id -> row offsets over one data snapshot, built once.
+
+    Review positions are sorted by (seller_id, review_date newest first),
+    so a seller's reviews are one contiguous slice and a page is an
+    O(log n) search plus an iloc of `limit` rows. Review counts,
+    rating sums, sentiment buckets and order counts are precomputed per
+    seller, so the dashboard summary never scans the review table.
+    """
+    def __init__(self, data):
+        reviews = data.get('reviews')
+        if reviews is None:
+            reviews = pd.DataFrame(columns=["review_id", "seller_id", "rating", "review_text", "review_date"])
+        self.reviews = reviews
+        n = len(reviews)
+
+        # One seller_id conversion per snapshot; sorted codes follow string order
+        codes, uniques = pd.factorize(reviews['seller_id'].astype(str), sort=True)
+        if 'review_date' in reviews.columns:
+            dates = pd.to_datetime(reviews['review_date'], errors='coerce')
+            # Negated so ascending order is newest first; missing dates sort last
+            date_keys = -dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            date_keys[dates.isna().to_numpy()] = np.iinfo(np.int64).max
+        else:
+            date_keys = np.zeros(n, dtype=np.int64)
+        self.review_ids = reviews['review_id'].astype(str).to_numpy() if 'review_id' in reviews.columns else np.arange(n).astype(str)
+
+        # Integer keys only (string comparisons would dominate the build);
+        # reviews from the same day keep their load order
+        self.positions = np.lexsort((date_keys, codes))
+        self.date_keys = date_keys[self.positions]
+        sorted_codes = codes[self.positions]
+        starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1)) if n else np.zeros(0, dtype=np.int64)
+        ends = np.append(starts[1:], n)
+        sellers = [str(uniques[c]) for c in sorted_codes[starts]]
+        self.ranges = {s: (int(a), int(b)) for s, a, b in zip(sellers, starts, ends)}
+
+        ratings = pd.to_numeric(reviews['rating'], errors='coerce').to_numpy(dtype=float) if n else np.zeros(0)
+        sorted_ratings = ratings[self.positions]
+        # Per-seller sums over each contiguous slice
+        boundaries = starts.astype(np.int64)
+        self.rating_sums = dict(zip(sellers, np.add.reduceat(np.nan_to_num(sorted_ratings), boundaries))) if n else {}
+        # Missing ratings stay in total_reviews but not in the average
+        self.rating_counts = dict(zip(sellers, np.add.reduceat((~np.isnan(sorted_ratings)).astype(np.int64), boundaries))) if n else {}
+        self.positive = dict(zip(sellers, np.add.reduceat((sorted_ratings >= 4).astype(np.int64), boundaries))) if n else {}
+        self.neutral = dict(zip(sellers, np.add.reduceat((sorted_ratings == 3).astype(np.int64), boundaries))) if n else {}
+
+        self.order_counts = {}
+        if data.get('orders') is not None:
+            self.order_counts = data['orders']['seller_id'].astype(str).value_counts().to_dict()
+        elif data.get('order_stats') is not None:
+            stats = data['order_stats']
+            self.order_counts = stats.groupby(stats['seller_id'].astype(str))['order_count'].sum().to_dict()
+
+    def summary(self, seller_id):
+        """Review and order totals for one seller, from the precomputed sums."""
+        start, end = self.ranges.get(seller_id, (0, 0))
+        total_reviews = end - start
+        rated = int(self.rating_counts.get(seller_id, 0))
+        positive = int(self.positive.get(seller_id, 0))
+        neutral = int(self.neutral.get(seller_id, 0))
+        return {
+            "total_reviews": total_reviews,
+            "avg_rating": float(self.rating_sums.get(seller_id, 0.0)) / rated if rated else 0,
+            "total_orders": int(self.order_counts.get(seller_id, 0)),
+            "sentiment": {"positive": positive, "neutral": neutral, "negative": total_reviews - positive - neutral}
+        }
+
+    def reviews_page(self, seller_id, limit=REVIEW_PAGE_SIZE, cursor=None):
+        """
+        Newest-first reviews of one seller after `cursor`.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        """
+        start, end = self.ranges.get(seller_id, (0, 0))
+        limit = max(1, min(int(limit), MAX_REVIEW_PAGE_SIZE))
+        if cursor:
+            date_key, review_id = decode_review_cursor(cursor)
+            # Resume after the cursor's review within its day; if that review
+            # is gone, repeat the day rather than skip part of it
+            lo = start + int(np.searchsorted(self.date_keys[start:end], date_key, side="left"))
+            hi = start + int(np.searchsorted(self.date_keys[start:end], date_key, side="right"))
+            same_day = np.flatnonzero(self.review_ids[self.positions[lo:hi]] == review_id)
+            start = lo + int(same_day[0]) + 1 if len(same_day) else lo
+        stop = min(end, start + limit)
+
+        page = self.reviews.iloc[self.positions[start:stop]].copy()
+        if 'review_date' in page.columns:
+            page['review_date'] = page['review_date'].astype(str)
+        # int32 ids of the compact resident table go out as the TEXT keys they are
+        if 'review_id' in page.columns and pd.api.types.is_integer_dtype(page['review_id']):
+            page['review_id'] = page['review_id'].astype(str)
+        next_cursor = None
+        if stop < end:
+            next_cursor = encode_review_cursor(self.date_keys[stop - 1], str(self.review_ids[self.positions[stop - 1]]))
+        return page.to_dict(orient="records"), next_cursor
@@ -0,0 +1,130 @@
+import os
+import json
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "snapshots"))
+MANIFEST_FILE = "manifest.json"
+# 2: nullable flag columns are stored as numeric 1.0/0.0/NaN (were strings)
+FORMAT_VERSION = 2
+
+def _save_strings(directory, column, series):
+    """Store a text column as int32 codes plus a UTF-8 blob of its distinct values."""
+    codes, uniques = pd.factorize(series)
+    encoded = [str(v).encode("utf-8") for v in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{column}.codes.npy"), codes.astype(np.int32))
+    np.save(os.path.join(directory, f"{column}.offsets.npy"), offsets)
+    with open(os.path.join(directory, f"{column}.blob"), "wb") as f:
+        f.write(b"".join(encoded))
+
+def _load_strings(directory, column, mmap_mode):
+    codes = np.load(os.path.join(directory, f"{column}.codes.npy"), mmap_mode=mmap_mode)
+    offsets = np.load(os.path.join(directory, f"{column}.offsets.npy"))
+    with open(os.path.join(directory, f"{column}.blob"), "rb") as f:
+        blob = f.read()
+    categories = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    # Categorical over the mapped codes: no per-row Python strings are built
+    return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype="str"), validate=False)
+
+def _is_nullable_flag(series):
+    """True/False columns holding nulls: pandas' nullable boolean, or object dtype of bools and None/NaN."""
+    if isinstance(series.dtype, pd.BooleanDtype):
+        return series.hasnans
+    if series.dtype != object:
+        return False
+    values = series.dropna()
+    return not values.empty and values.map(type).isin((bool, np.bool_)).all()
+
+def save_snapshot(frames, watermarks=None, schema=None, path=SNAPSHOT_DIR, full_loaded_at=None):
+    """
+    Write {table: DataFrame} as one .npy file per column plus a JSON manifest.
+    The new snapshot is written next to the old one and swapped in with a
+    rename, so readers never see a half-written directory.
+    """
+    staging = f"{path}.tmp-{os.getpid()}-{int(time.time() * 1000)}"
+    os.makedirs(staging)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "watermarks": watermarks or {},
+        "full_loaded_at": full_loaded_at,
+        "schema": {table: list(columns) for table, columns in (schema or {}).items()},
+        "tables": {}
+    }
+    try:
+        for table, df in frames.items():
+            directory = os.path.join(staging, table)
+            os.makedirs(directory)
+            columns = {}
+            for column in df.columns:
+                series = df[column]
+                if pd.api.types.is_bool_dtype(series) and not series.hasnans:
+                    kind = "bool"
+                    np.save(os.path.join(directory, f"{column}.npy"), series.to_numpy(dtype=bool))
+                elif _is_nullable_flag(series):
+                    # 1.0/0.0/NaN, the same shape SQLite returns for a nullable BOOLEAN
+                    kind = "numeric"
+                    np.save(os.path.join(directory, f"{column}.npy"), series.astype("boolean").to_numpy(dtype=float, na_value=np.nan))
+                elif pd.api.types.is_datetime64_any_dtype(series):
+                    kind = "datetime"
+                    values = series.dt.tz_convert(None) if series.dt.tz is not None else series
+                    np.save(os.path.join(directory, f"{column}.npy"), values.to_numpy(dtype="datetime64[us]"))
+                elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                    kind = "numeric"
+                    values = series.to_numpy(dtype=float, na_value=np.nan) if series.hasnans else series.to_numpy()
+                    np.save(os.path.join(directory, f"{column}.npy"), values)
+                else:
+                    kind = "string"
+                    _save_strings(directory, column, series)
+                columns[column] = kind
+            manifest["tables"][table] = {"rows": len(df), "columns": columns}
+
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        previous = f"{path}.old-{os.getpid()}-{int(time.time() * 1000)}"
+        if os.path.exists(path):
+            os.rename(path, previous)
+        os.rename(staging, path)
+        # Mapped files of the old snapshot stay valid until their maps close
+        shutil.rmtree(previous, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+def read_manifest(path=SNAPSHOT_DIR):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return manifest
+
+def load_snapshot(path=SNAPSHOT_DIR, mmap=True):
+    """
+    Open a snapshot written by save_snapshot. Numeric, flag and date columns
+    are memory-mapped; text columns come back as categoricals over mapped
+    codes. Returns (frames, manifest), or (None, None) if there is none.
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None, None
+    mmap_mode = "r" if mmap else None
+    frames = {}
+    for table, info in manifest["tables"].items():
+        directory = os.path.join(path, table)
+        columns = {}
+        for column, kind in info["columns"].items():
+            if kind == "string":
+                columns[column] = _load_strings(directory, column, mmap_mode)
+            else:
+                columns[column] = np.load(os.path.join(directory, f"{column}.npy"), mmap_mode=mmap_mode)
+        frames[table] = pd.DataFrame(columns, copy=False) if columns else pd.DataFrame(index=range(info["rows"]))
+    return frames, manifest
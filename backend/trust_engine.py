@@ -3,18 +3,165 @@ import pandas as pd
 import numpy as np
 from .model import ReviewAnalyzer
 
+def _as_lookup(series):
+    # Keep NumPy scalars (unlike Series.to_dict) so results match per-seller Series.mean()/std()
+    return dict(zip(series.index, series.to_numpy()))
+
 class TrustScoreEngine:
-    def __init__(self, data):
+    def __init__(self, data, anomaly_model=None):
         self.sellers = data['sellers']
-        self.orders = data['orders']
+        # Either raw order rows, or per-seller order aggregates pushed down
+        # to the data source (see DataSource.fetch_seller_aggregates)
+        self.orders = data.get('orders')
+        self.order_stats = data.get('order_stats')
+        if self.orders is None:
+            self.orders = pd.DataFrame(columns=['seller_id'])
         self.reviews = data['reviews']
         
         # Precompute
-        self.analyzer = ReviewAnalyzer(self.reviews)
+        self.analyzer = ReviewAnalyzer(self.reviews, anomaly_model=anomaly_model)
         self.suspicious_reviews = self.analyzer.detect_fake_reviews()
         self.seller_stats = {}
 
     def calculate_scores(self):
+        """
+        Score every seller using grouped aggregates over orders and reviews.
+        Each table is scanned a constant number of times instead of once per seller.
+        """
+        reviews = self.reviews
+        has_reviews = 'seller_id' in reviews.columns and len(reviews) > 0
+
+        # Order aggregates: count, delivery mean, return mean
+        if self.order_stats is not None:
+            order_aggs = self._order_aggregates_from_stats(self.order_stats)
+        else:
+            order_aggs = self._order_aggregates(self.orders)
+        tx_counts = order_aggs['tx_counts']
+        delivery_means = order_aggs['delivery_means']
+        delivery_fallback = order_aggs['delivery_fallback']
+        return_means = order_aggs['return_means']
+
+        # Review aggregates: total, non-suspicious count, rating std of non-suspicious
+        review_totals = {}
+        valid_counts = {}
+        rating_stds = {}
+        if has_reviews:
+            valid = ~reviews['review_id'].isin(self.suspicious_reviews)
+            review_totals = reviews.groupby('seller_id', sort=False).size().to_dict()
+            valid_reviews = reviews[valid]
+            valid_groups = valid_reviews.groupby('seller_id', sort=False)
+            valid_counts = valid_groups.size().to_dict()
+            # Per-seller sample std of the valid ratings (ddof=1, NaN skipped)
+            rating_stds = _as_lookup(valid_groups['rating'].std())
+
+        scores = []
+        for seller in self.sellers.to_dict(orient="records"):
+            sid = seller['seller_id']
+            tx_count = tx_counts.get(sid, 0)
+
+            # --- 1. DELIVERY SCORE ---
+            if tx_count > 0 and order_aggs['has_on_time']:
+                delivery_score = delivery_means[sid] * 100
+            elif tx_count > 0 and order_aggs['has_delivery_days']:
+                delivered_count, on_time_count = delivery_fallback[sid]
+                if delivered_count > 0:
+                    delivery_score = (on_time_count / delivered_count) * 100
+                else:
+                    delivery_score = 50
+            else:
+                delivery_score = 50
+
+            # --- 2. RETURN SCORE ---
+            if tx_count > 0 and order_aggs['has_returned']:
+                return_score = max(0, 100 - (return_means[sid] * 200))
+            else:
+                return_score = 50
+
+            total_reviews = review_totals.get(sid, 0)
+            valid_count = valid_counts.get(sid, 0)
+            std_dev = rating_stds.get(sid) if valid_count > 1 else None
+
+            scores.append(self._compose_score(
+                seller, delivery_score, return_score,
+                total_reviews, valid_count, std_dev, tx_count
+            ))
+
+        return scores
+
+    @staticmethod
+    def _order_aggregates(orders):
+        """Per-seller order count, delivery and return means from raw order rows."""
+        aggs = {
+            'tx_counts': {},
+            'delivery_means': {},
+            'delivery_fallback': {},
+            'return_means': {},
+            'has_on_time': 'on_time_delivery' in orders.columns,
+            'has_delivery_days': 'delivery_days' in orders.columns,
+            'has_returned': 'returned' in orders.columns
+        }
+        if 'seller_id' not in orders.columns or len(orders) == 0:
+            return aggs
+
+        order_groups = orders.groupby('seller_id', sort=False)
+        aggs['tx_counts'] = order_groups.size().to_dict()
+        if aggs['has_on_time']:
+            aggs['delivery_means'] = _as_lookup(order_groups['on_time_delivery'].mean())
+        elif aggs['has_delivery_days']:
+            # Fallback to delivery_days if on_time_delivery missing
+            delivered = orders['delivery_days'] > 0 # assume 0 is cancelled
+            on_time = delivered & (orders['delivery_days'] <= 5)
+            counts = pd.DataFrame({
+                'seller_id': orders['seller_id'],
+                'delivered': delivered,
+                'on_time': on_time
+            }).groupby('seller_id', sort=False)[['delivered', 'on_time']].sum()
+            aggs['delivery_fallback'] = {
+                sid: (int(row.delivered), int(row.on_time))
+                for sid, row in zip(counts.index, counts.itertuples(index=False))
+            }
+        if aggs['has_returned']:
+            aggs['return_means'] = _as_lookup(order_groups['returned'].mean())
+        return aggs
+
+    @staticmethod
+    def _order_aggregates_from_stats(order_stats):
+        """
+        Same aggregates from one row per seller: order_count, on_time_sum/
+        on_time_count, returned_sum/returned_count and optionally
+        delivered_count/delivered_on_time. Sums and counts of 0/1 flags are
+        exact, so the means equal the raw-row means bit for bit.
+        """
+        stats = order_stats.set_index('seller_id')
+        has_on_time = 'on_time_sum' in stats.columns
+        has_delivery_days = 'delivered_count' in stats.columns
+        has_returned = 'returned_sum' in stats.columns
+        aggs = {
+            'tx_counts': {sid: int(n) for sid, n in stats['order_count'].items() if n > 0},
+            'delivery_means': {},
+            'delivery_fallback': {},
+            'return_means': {},
+            'has_on_time': has_on_time,
+            'has_delivery_days': has_delivery_days,
+            'has_returned': has_returned
+        }
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if has_on_time:
+                aggs['delivery_means'] = _as_lookup(stats['on_time_sum'].astype(float) / stats['on_time_count'].astype(float))
+            elif has_delivery_days:
+                aggs['delivery_fallback'] = {
+                    sid: (int(delivered), int(on_time))
+                    for sid, delivered, on_time in zip(stats.index, stats['delivered_count'], stats['delivered_on_time'])
+                }
+            if has_returned:
+                aggs['return_means'] = _as_lookup(stats['returned_sum'].astype(float) / stats['returned_count'].astype(float))
+        return aggs
+
+    def calculate_scores_iterative(self):
+        """
+        Reference implementation that filters orders and reviews once per seller.
+        Kept to cross-check calculate_scores (see verify_scores.py).
+        """
         scores = []
         for _, seller in self.sellers.iterrows():
             sid = seller['seller_id']
@@ -48,80 +195,151 @@ class TrustScoreEngine:
             else:
                 return_score = 50
 
-            # --- 3. RESPONSE SCORE ---
-            if 'avg_response_time_hours' in seller:
-                rt = seller['avg_response_time_hours']
-                # Lower is better. 0h -> 100, 24h -> 0
-                response_score = max(0, 100 - (rt * 4))
-            else:
-                response_score = 50 # Default
-
-            # --- 4. ACCOUNT AGE SCORE ---
-            if 'account_age_days' in seller:
-                age_days = seller['account_age_days']
-                # 2 years (730 days) = 100 score
-                age_score = min(100, (age_days / 730) * 100)
-            else:
-                age_score = 50
-
-            # --- 5. AUTHENTICITY SCORE ---
             total_reviews = len(s_reviews)
             valid_reviews = s_reviews[~s_reviews['review_id'].isin(self.suspicious_reviews)]
             valid_count = len(valid_reviews)
-            
-            if total_reviews > 0:
-                authenticity_score = (valid_count / total_reviews) * 100
-            else:
-                authenticity_score = 50
+            std_dev = valid_reviews['rating'].std() if valid_count > 1 else None
 
-            # --- 6. CONSISTENCY SCORE ---
-            if valid_count > 1:
-                std_dev = valid_reviews['rating'].std()
-                # Lower std dev is better. 0 -> 100. 2 -> 0.
-                consistency_score = max(0, 100 - (std_dev * 50))
-            else:
-                consistency_score = 50
-
-            # --- 7. FINAL TRUST SCORE ---
-            trust_score = (
-                0.25 * delivery_score +
-                0.20 * return_score +
-                0.15 * response_score +
-                0.20 * authenticity_score +
-                0.10 * consistency_score +
-                0.10 * age_score
-            )
-
-            # --- 8. CONFIDENCE SCORE ---
-            tx_count = len(s_orders)
-            confidence_score = min(100, (tx_count / 200) * 100) # 200 tx gives full confidence
-
-            # --- 9. RISK LEVEL ---
-            if trust_score > 85:
-                risk = "Low"
-            elif trust_score >= 70:
-                risk = "Medium"
-            else:
-                risk = "High"
-
-            scores.append({
-                "seller_id": str(sid),
-                "name": seller['seller_name'],
-                "trust_score": round(trust_score, 1),
-                "confidence_score": round(confidence_score, 1),
-                "risk_level": risk,
-                "metrics": {
-                    "delivery": round(delivery_score, 1),
-                    "return_rate_score": round(return_score, 1), 
-                    "response": round(response_score, 1),
-                    "authenticity": round(authenticity_score, 1),
-                    "consistency": round(consistency_score, 1),
-                    "age": round(age_score, 1)
-                },
-                "stats": {
-                    "fake_reviews": total_reviews - valid_count,
-                    "real_reviews": valid_count
-                }
-            })
+            scores.append(self._compose_score(
+                seller, delivery_score, return_score,
+                total_reviews, valid_count, std_dev, len(s_orders)
+            ))
             
         return scores
+
+    @staticmethod
+    def _compose_score(seller, delivery_score, return_score, total_reviews, valid_count, std_dev, tx_count):
+        """Combine per-seller aggregates into the final score dict."""
+        # --- 3. RESPONSE SCORE ---
+        if 'avg_response_time_hours' in seller:
+            rt = seller['avg_response_time_hours']
+            # Lower is better. 0h -> 100, 24h -> 0
+            response_score = max(0, 100 - (rt * 4))
+        else:
+            response_score = 50 # Default
+
+        # --- 4. ACCOUNT AGE SCORE ---
+        if 'account_age_days' in seller:
+            age_days = seller['account_age_days']
+            # 2 years (730 days) = 100 score
+            age_score = min(100, (age_days / 730) * 100)
+        else:
+            age_score = 50
+
+        # --- 5. AUTHENTICITY SCORE ---
+        if total_reviews > 0:
+            authenticity_score = (valid_count / total_reviews) * 100
+        else:
+            authenticity_score = 50
+
+        # --- 6. CONSISTENCY SCORE ---
+        if valid_count > 1:
+            # Lower std dev is better. 0 -> 100. 2 -> 0.
+            consistency_score = max(0, 100 - (std_dev * 50))
+        else:
+            consistency_score = 50
+
+        # --- 7. FINAL TRUST SCORE ---
+        trust_score = (
+            0.25 * delivery_score +
+            0.20 * return_score +
+            0.15 * response_score +
+            0.20 * authenticity_score +
+            0.10 * consistency_score +
+            0.10 * age_score
+        )
+
+        # --- 8. CONFIDENCE SCORE ---
+        confidence_score = min(100, (tx_count / 200) * 100) # 200 tx gives full confidence
+
+        # --- 9. RISK LEVEL ---
+        if trust_score > 85:
+            risk = "Low"
+        elif trust_score >= 70:
+            risk = "Medium"
+        else:
+            risk = "High"
+
+        return {
+            "seller_id": str(seller['seller_id']),
+            "name": seller['seller_name'],
+            "trust_score": round(trust_score, 1),
+            "confidence_score": round(confidence_score, 1),
+            "risk_level": risk,
+            "metrics": {
+                "delivery": round(delivery_score, 1),
+                "return_rate_score": round(return_score, 1), 
+                "response": round(response_score, 1),
+                "authenticity": round(authenticity_score, 1),
+                "consistency": round(consistency_score, 1),
+                "age": round(age_score, 1)
+            },
+            "stats": {
+                "fake_reviews": total_reviews - valid_count,
+                "real_reviews": valid_count
+            }
+        }
+
+def score_seller_stats(seller_stats):
+    """
+    Score every seller from the seller_stats view alone (one row per seller,
+    see db_setup.sql), without order or review rows.
+    Authenticity comes from the reviews' stored flagged_fake column (written
+    by data_loader.persist_review_flags) instead of running ReviewAnalyzer
+    here, and the rating std is rebuilt from count/sum/
+    sum of squares, so it can differ from the row-based std in the last bits.
+    """
+    scores = []
+    for row in seller_stats.to_dict(orient="records"):
+        tx_count = int(row['order_count'])
+
+        # --- 1. DELIVERY SCORE ---
+        if tx_count > 0 and row['on_time_count'] > 0:
+            delivery_score = row['on_time_sum'] / row['on_time_count'] * 100
+        else:
+            delivery_score = 50
+
+        # --- 2. RETURN SCORE ---
+        if tx_count > 0 and row['returned_count'] > 0:
+            return_score = max(0, 100 - (row['returned_sum'] / row['returned_count'] * 200))
+        else:
+            return_score = 50
+
+        total_reviews = int(row['review_count'])
+        valid_count = total_reviews - int(row['flagged_count'])
+        n = row['rating_count']
+        std_dev = None
+        if valid_count > 1 and n > 1:
+            variance = (row['rating_sumsq'] - row['rating_sum'] ** 2 / n) / (n - 1)
+            std_dev = np.sqrt(max(variance, 0.0))
+        elif valid_count > 1:
+            std_dev = np.nan
+
+        seller = {
+            'seller_id': row['seller_id'],
+            'seller_name': row['seller_name'],
+            'account_age_days': row['account_age_days'],
+            'avg_response_time_hours': row['avg_response_time_hours']
+        }
+        scores.append(TrustScoreEngine._compose_score(
+            seller, delivery_score, return_score,
+            total_reviews, valid_count, std_dev, tx_count
+        ))
+    return scores
+
+def platform_benchmarks(seller_scores):
+    """Platform averages used as benchmarks on the seller dashboard."""
+    def safe_avg(key, nested=False):
+        values = []
+        for s in seller_scores:
+            val = s['metrics'][key] if nested else s[key]
+            values.append(float(val)) # Explicit cast
+        return round(sum(values) / len(values), 1) if values else 0.0
+
+    return {
+        "avg_trust_score": safe_avg('trust_score'),
+        "avg_delivery": safe_avg('delivery', nested=True),
+        "avg_return": safe_avg('return_rate_score', nested=True),
+        "avg_response": safe_avg('response', nested=True),
+        "avg_authenticity": safe_avg('authenticity', nested=True)
+    }
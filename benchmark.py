@@ -0,0 +1,305 @@
+"""
+Performance benchmarks for loading, fake-review detection, scoring and the API.
+
+Everything runs locally: synthetic data is generated per scale
+(generate_improved_data.generate), seeded into a
+temporary SQLite database (DATA_SOURCE=sqlite) and read back through
+load_data(). Each scale runs in its own process so peak RSS is not inherited
+from a previous scale. Per stage the wall time, peak RSS and (unless
+--no-allocations) the tracemalloc peak / net allocation are recorded.
+
+Results are compared with benchmarks/baseline.json; a stage that got slower
+or bigger than the tolerances allow is reported as a regression (exit 1).
+
+Usage:
+    python benchmark.py                        # all scales, compare with baseline
+    python benchmark.py --scales 20,1k         # only some scales
+    python benchmark.py --scales 1k --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+from generate_improved_data import generate
+
+SCALES = {"20": 20, "1k": 1000, "10k": 10000, "100k": 100000}
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# Regression thresholds: relative growth and the absolute floor below which
+# differences are treated as noise
+TIME_TOLERANCE = 0.25
+TIME_FLOOR_SECONDS = 0.02
+MEMORY_TOLERANCE = 0.20
+MEMORY_FLOOR_MB = 16
+
+# --- MEASUREMENT ---
+
+def rss_bytes():
+    """Current resident set size (Linux /proc; falls back to the lifetime peak)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class RSSSampler:
+    """Polls RSS on a background thread to find the peak within one stage."""
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+def mb(n):
+    return round(n / (1024 * 1024), 2)
+
+def measure(name, func, allocations=True):
+    """Run func() once for time/RSS and, optionally, again under tracemalloc."""
+    max_before = peak_rss_bytes()
+    rss_before = rss_bytes()
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+    # A new process-lifetime maximum can only have been reached in this stage
+    peak = max(sampler.peak, peak_rss_bytes() if peak_rss_bytes() > max_before else 0)
+    stats = {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": mb(peak),
+        "rss_delta_mb": mb(rss_bytes() - rss_before)
+    }
+    if allocations:
+        # Second run: tracemalloc slows Python-level code, so it is not timed
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        after, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["alloc_peak_mb"] = mb(peak_traced - before)
+        stats["alloc_net_mb"] = mb(after - before)
+    if isinstance(result, dict) and "extra" in result:
+        stats.update(result["extra"])
+    print(f"  {name:<22} {stats['seconds']:>9.3f}s  peak RSS {stats['peak_rss_mb']:>8.1f} MB"
+          + (f"  alloc peak {stats['alloc_peak_mb']:>8.1f} MB" if allocations else ""))
+    return stats
+
+# --- STAGES ---
+
+def run_scale(label, n_sellers, orders_per_seller, reviews_per_seller, allocations, api_requests):
+    workdir = tempfile.mkdtemp(prefix=f"trustscore-bench-{label}-")
+    # Configure the backend before it is imported: local SQLite, no snapshots or model
+    os.environ["DATA_SOURCE"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["SNAPSHOT_DIR"] = ""
+    os.environ["TRUSTSCORE_OFFLINE"] = "0"
+    os.environ["ANOMALY_MODEL_PATH"] = ""
+    from backend import data_loader
+    from backend.data_sources import get_data_source
+    from backend.model import ReviewAnalyzer
+    from backend.trust_engine import TrustScoreEngine, score_seller_stats
+    from backend.incremental_scores import IncrementalScoreEngine
+
+    print(f"\nScale {label}: {n_sellers} sellers")
+    stages = {}
+    ctx = {}
+
+    def generate_data():
+        counts = generate(workdir, n_sellers, n_sellers * orders_per_seller, n_sellers * reviews_per_seller, seed=7)
+        ctx["rows"] = {table: counts[table] for table in ("sellers", "orders", "reviews")}
+    stages["generate"] = measure("generate", generate_data, allocations=False)
+
+    source = get_data_source()
+    source.data_dir = workdir
+    stages["seed_sqlite"] = measure("seed_sqlite", source.connection, allocations=False)
+
+    def load_full():
+        data_loader.get_loader().frames = None
+        ctx["data"] = data_loader.load_data(full=True)
+    stages["load_full"] = measure("load_full", load_full, allocations)
+    stages["load_delta"] = measure("load_delta", lambda: data_loader.load_data(), allocations)
+
+    data = ctx["data"]
+    stages["detect"] = measure("detect", lambda: ReviewAnalyzer(data["reviews"]).detect_fake_reviews(), allocations)
+    engine = TrustScoreEngine(data)
+    stages["score"] = measure("score", engine.calculate_scores, allocations)
+    live = IncrementalScoreEngine.from_engine(engine)
+    seller_ids = data["sellers"]["seller_id"].tolist()
+    def score_incremental():
+        # 1,000 new orders as single events, then the refreshed score list
+        for i in range(1000):
+            live.add_order(seller_ids[i % len(seller_ids)], on_time_delivery=1, returned=0, delivery_days=3)
+        return live.scores()
+    stages["score_incremental"] = measure("score_incremental", score_incremental, allocations)
+    stages["score_seller_stats"] = measure(
+        "score_seller_stats", lambda: score_seller_stats(source.fetch_seller_stats()), allocations
+    )
+
+    stages.update(run_api_stages(ctx["rows"]["sellers"], api_requests))
+    return {
+        "sellers": n_sellers,
+        "rows": ctx["rows"],
+        "stages": stages
+    }
+
+def run_api_stages(n_sellers, api_requests):
+    import httpx
+    from backend.main import app, score_cache, score_store
+
+    async def timed_requests(paths):
+        latencies = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            for path in paths:
+                start = time.perf_counter()
+                res = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if res.status_code != 200:
+                    raise RuntimeError(f"GET {path} -> {res.status_code}: {res.text[:200]}")
+        latencies = np.array(latencies) * 1000
+        return {"extra": {
+            "requests": len(paths),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2)
+        }}
+
+    rng = np.random.default_rng(11)
+    ids = rng.integers(1, n_sellers + 1, api_requests)
+    stages = {}
+    # Cold: the first request builds the score snapshot (load + detect + score)
+    score_cache.invalidate()
+    score_store.mark_stale()
+    stages["api_cold_sellers"] = measure("api_cold_sellers", lambda: asyncio.run(timed_requests(["/api/sellers"])), allocations=False)
+    stages["api_sellers"] = measure("api_sellers", lambda: asyncio.run(timed_requests(["/api/sellers"] * max(1, api_requests // 10))), allocations=False)
+    stages["api_buyer"] = measure("api_buyer", lambda: asyncio.run(timed_requests([f"/api/buyer/{i}" for i in ids])), allocations=False)
+    stages["api_seller_dashboard"] = measure(
+        "api_seller_dashboard",
+        lambda: asyncio.run(timed_requests([f"/api/seller/dashboard?seller_id={i}" for i in ids])),
+        allocations=False
+    )
+    return stages
+
+# --- BASELINES ---
+
+def find_regressions(results, baseline):
+    regressions = []
+    for label, scale in results.items():
+        base_scale = baseline.get("scales", {}).get(label)
+        if not base_scale:
+            continue
+        for stage, cur in scale["stages"].items():
+            base = base_scale["stages"].get(stage)
+            if not base:
+                continue
+            checks = [("seconds", TIME_TOLERANCE, TIME_FLOOR_SECONDS, "s")]
+            checks += [(key, MEMORY_TOLERANCE, MEMORY_FLOOR_MB, " MB") for key in ("peak_rss_mb", "alloc_peak_mb")]
+            for key, tolerance, floor, unit in checks:
+                if key not in cur or key not in base:
+                    continue
+                if cur[key] > base[key] * (1 + tolerance) and cur[key] - base[key] > floor:
+                    regressions.append(f"{label}/{stage}: {key} {base[key]}{unit} -> {cur[key]}{unit} (+{(cur[key] / base[key] - 1) * 100:.0f}%)")
+    return regressions
+
+def save_baseline(results, path):
+    baseline = {"scales": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    baseline["scales"].update(results)
+    baseline["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    baseline["python"] = platform.python_version()
+    baseline["machine"] = f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Baseline written to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark loading, detection, scoring and the API at several scales")
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--orders-per-seller", type=int, default=125)
+    parser.add_argument("--reviews-per-seller", type=int, default=41)
+    parser.add_argument("--api-requests", type=int, default=50)
+    parser.add_argument("--no-allocations", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # One scale in this process; results go to the given JSON file
+        label, output = args.worker.split(":", 1)
+        result = run_scale(label, SCALES[label], args.orders_per_seller, args.reviews_per_seller,
+                           not args.no_allocations, args.api_requests)
+        with open(output, "w") as f:
+            json.dump(result, f)
+        sys.exit(0)
+
+    labels = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in labels if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    results = {}
+    for label in labels:
+        fd, output = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", f"{label}:{output}",
+               "--orders-per-seller", str(args.orders_per_seller),
+               "--reviews-per-seller", str(args.reviews_per_seller),
+               "--api-requests", str(args.api_requests)]
+        if args.no_allocations:
+            cmd.append("--no-allocations")
+        proc = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            sys.exit(f"Scale {label} failed (exit {proc.returncode})")
+        with open(output) as f:
+            results[label] = json.load(f)
+        os.remove(output)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scales": results}, f, indent=2)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        regressions = find_regressions(results, json.load(f))
+    if regressions:
+        print("\nREGRESSIONS against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
@@ -43,5 +43,168 @@ CREATE TABLE IF NOT EXISTS users (
 -- Create Indexes for Performance
 CREATE INDEX IF NOT EXISTS idx_orders_seller_id ON orders(seller_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_seller_id ON reviews(seller_id);
+-- Watermark columns: delta refreshes filter on them and the change probe
+-- reads their maximum
+CREATE INDEX IF NOT EXISTS idx_sellers_created_at ON sellers(created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders(order_date);
+CREATE INDEX IF NOT EXISTS idx_reviews_review_date ON reviews(review_date);
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+-- Per-seller order and review statistics, one row per seller.
+-- Scoring can run from this view alone (SCORE_FROM_SELLER_STATS=1), so the
+-- API downloads O(sellers) rows instead of every order and review.
+-- "valid" ratings exclude reviews flagged as fake; rating_sumsq gives the
+-- rating standard deviation: sqrt((sumsq - sum^2 / n) / (n - 1)).
+CREATE MATERIALIZED VIEW IF NOT EXISTS seller_stats AS
+SELECT
+    s.seller_id,
+    s.seller_name,
+    s.account_age_days,
+    s.avg_response_time_hours,
+    COALESCE(o.order_count, 0) AS order_count,
+    COALESCE(o.on_time_sum, 0) AS on_time_sum,
+    COALESCE(o.on_time_count, 0) AS on_time_count,
+    COALESCE(o.returned_sum, 0) AS returned_sum,
+    COALESCE(o.returned_count, 0) AS returned_count,
+    COALESCE(r.review_count, 0) AS review_count,
+    COALESCE(r.flagged_count, 0) AS flagged_count,
+    COALESCE(r.rating_count, 0) AS rating_count,
+    COALESCE(r.rating_sum, 0) AS rating_sum,
+    COALESCE(r.rating_sumsq, 0) AS rating_sumsq
+FROM sellers s
+LEFT JOIN (
+    SELECT
+        seller_id,
+        COUNT(*) AS order_count,
+        SUM(CASE WHEN on_time_delivery THEN 1 ELSE 0 END) AS on_time_sum,
+        COUNT(on_time_delivery) AS on_time_count,
+        SUM(CASE WHEN returned THEN 1 ELSE 0 END) AS returned_sum,
+        COUNT(returned) AS returned_count
+    FROM orders
+    GROUP BY seller_id
+) o ON o.seller_id = s.seller_id
+LEFT JOIN (
+    SELECT
+        seller_id,
+        COUNT(*) AS review_count,
+        SUM(CASE WHEN flagged_fake THEN 1 ELSE 0 END) AS flagged_count,
+        COUNT(CASE WHEN flagged_fake THEN NULL ELSE rating END) AS rating_count,
+        SUM(CASE WHEN flagged_fake THEN NULL ELSE rating END) AS rating_sum,
+        SUM(CASE WHEN flagged_fake THEN NULL ELSE rating * rating END) AS rating_sumsq
+    FROM reviews
+    GROUP BY seller_id
+) r ON r.seller_id = s.seller_id;
+
+-- Needed for REFRESH ... CONCURRENTLY (readers are not blocked while it runs)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_seller_stats_seller_id ON seller_stats(seller_id);
+
+-- Refresh after bulk loads or on a schedule; callable as an RPC:
+--   supabase.rpc("refresh_seller_stats").execute()
+CREATE OR REPLACE FUNCTION refresh_seller_stats()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY seller_stats;
+END;
+$$;
+
+-- Persisted scores, one row per seller, rewritten after every recompute.
+-- The API reads these by primary key instead of rescoring raw tables.
+CREATE TABLE IF NOT EXISTS seller_scores (
+    seller_id TEXT PRIMARY KEY REFERENCES sellers(seller_id),
+    seller_name TEXT,
+    trust_score FLOAT,
+    confidence_score FLOAT,
+    risk_level TEXT,
+    delivery FLOAT,
+    return_rate_score FLOAT,
+    response FLOAT,
+    authenticity FLOAT,
+    consistency FLOAT,
+    age FLOAT,
+    fake_reviews INTEGER,
+    real_reviews INTEGER,
+    computation_version INTEGER NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_seller_scores_version ON seller_scores(computation_version);
+
+-- Computation versions, shared by every API process
+CREATE SEQUENCE IF NOT EXISTS seller_scores_version_seq;
+-- Never moves backwards when this script is re-run
+SELECT setval('seller_scores_version_seq', GREATEST(
+    (SELECT COALESCE(MAX(computation_version), 0) FROM seller_scores),
+    (SELECT last_value FROM seller_scores_version_seq),
+    1
+));
+
+CREATE OR REPLACE FUNCTION next_score_version()
+RETURNS BIGINT
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    SELECT nextval('seller_scores_version_seq');
+$$;
+
+-- A computation is written here in batches, then swapped into seller_scores
+-- in one transaction by swap_seller_scores, so readers never see a mix of
+-- computations
+CREATE TABLE IF NOT EXISTS seller_scores_staging (
+    seller_id TEXT NOT NULL,
+    seller_name TEXT,
+    trust_score FLOAT,
+    confidence_score FLOAT,
+    risk_level TEXT,
+    delivery FLOAT,
+    return_rate_score FLOAT,
+    response FLOAT,
+    authenticity FLOAT,
+    consistency FLOAT,
+    age FLOAT,
+    fake_reviews INTEGER,
+    real_reviews INTEGER,
+    computation_version INTEGER NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (computation_version, seller_id)
+);
+
+-- Returns false (and installs nothing) when a newer computation is
+-- already in seller_scores
+CREATE OR REPLACE FUNCTION swap_seller_scores(p_version INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('seller_scores'));
+    IF EXISTS (SELECT 1 FROM seller_scores WHERE computation_version > p_version) THEN
+        DELETE FROM seller_scores_staging WHERE computation_version <= p_version;
+        RETURN FALSE;
+    END IF;
+    INSERT INTO seller_scores (seller_id, seller_name, trust_score, confidence_score, risk_level, delivery, return_rate_score, response, authenticity, consistency, age, fake_reviews, real_reviews, computation_version, computed_at)
+    SELECT seller_id, seller_name, trust_score, confidence_score, risk_level, delivery, return_rate_score, response, authenticity, consistency, age, fake_reviews, real_reviews, computation_version, computed_at
+    FROM seller_scores_staging WHERE computation_version = p_version
+    ON CONFLICT (seller_id) DO UPDATE SET
+        seller_name = EXCLUDED.seller_name,
+        trust_score = EXCLUDED.trust_score,
+        confidence_score = EXCLUDED.confidence_score,
+        risk_level = EXCLUDED.risk_level,
+        delivery = EXCLUDED.delivery,
+        return_rate_score = EXCLUDED.return_rate_score,
+        response = EXCLUDED.response,
+        authenticity = EXCLUDED.authenticity,
+        consistency = EXCLUDED.consistency,
+        age = EXCLUDED.age,
+        fake_reviews = EXCLUDED.fake_reviews,
+        real_reviews = EXCLUDED.real_reviews,
+        computation_version = EXCLUDED.computation_version,
+        computed_at = EXCLUDED.computed_at;
+    DELETE FROM seller_scores WHERE computation_version <> p_version;
+    DELETE FROM seller_scores_staging WHERE computation_version <= p_version;
+    RETURN TRUE;
+END;
+$$;
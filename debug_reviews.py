@@ -1,5 +1,5 @@
 from backend.data_loader import load_data
-from backend.model import ReviewAnalyzer
+from backend.model import ReviewAnalyzer, build_anomaly_features, ANOMALY_FEATURES
 import pandas as pd
 
 print("Loading data...")
@@ -25,8 +25,6 @@ print("Top 5 most frequent review texts:")
 print(reviews['review_text'].value_counts().head(5))
 
 # Check Isolation Forest inputs
-features = pd.DataFrame()
-features['rating'] = reviews['rating']
-features['length'] = reviews['review_text'].fillna("").apply(len)
+features = pd.DataFrame(build_anomaly_features(reviews), columns=ANOMALY_FEATURES)
 print("\n--- Anomaly Features Stats ---")
 print(features.describe())
@@ -33,7 +33,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         if (response.ok) {
             // Check which page we are on
             if (window.location.pathname.includes('seller_reviews.html')) {
-                renderReviewPage(data);
+                renderReviewPage(data, sellerId);
             } else {
                 updateSellerUI(data); // Dashboard logic
             }
@@ -47,7 +47,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
 });
 
-function renderReviewPage(data) {
+function renderReviewPage(data, sellerId) {
     // Stats
     document.getElementById('pageAvgRating').textContent = data.summary.avg_rating;
     document.getElementById('pageTotalReviews').textContent = data.summary.total_reviews;
@@ -67,11 +67,33 @@ function renderReviewPage(data) {
         return;
     }
 
-    // Sort by date desc (if available, otherwise rely on backend order)
-    // Assuming backend sends reliable order or we sort manually here if needed
-    // data.reviews.sort((a, b) => new Date(b.review_date) - new Date(a.review_date));
+    // Backend sends reviews newest first, one page at a time
+    appendReviewRows(tbody, data.reviews);
+    setupLoadMore(tbody, sellerId, data.reviews_page ? data.reviews_page.next_cursor : null);
+}
+
+function setupLoadMore(tbody, sellerId, cursor) {
+    const btn = document.getElementById('loadMoreReviews');
+    if (!btn) return;
+    btn.style.display = cursor ? 'inline-block' : 'none';
+    btn.onclick = async () => {
+        btn.disabled = true;
+        try {
+            const res = await fetch(`/api/seller/reviews?seller_id=${sellerId}&cursor=${encodeURIComponent(cursor)}`);
+            const page = await res.json();
+            if (!res.ok) throw new Error(page.detail || res.statusText);
+            appendReviewRows(tbody, page.reviews);
+            setupLoadMore(tbody, sellerId, page.next_cursor);
+        } catch (err) {
+            console.error('Error loading more reviews:', err);
+        } finally {
+            btn.disabled = false;
+        }
+    };
+}
 
-    data.reviews.forEach(rev => {
+function appendReviewRows(tbody, reviews) {
+    reviews.forEach(rev => {
         const rating = Number(rev.rating);
         let sentimentBadge = '';
         if (rating >= 4) sentimentBadge = '<span class="trust-badge risk-low">Positive</span>';
@@ -192,24 +214,28 @@ function renderTrendChart(trendData) {
 
 function renderBenchmarkChart(seller, benchmarks) {
     const ctx = document.getElementById('benchmarkChart').getContext('2d');
+    const datasets = [
+        {
+            label: 'You',
+            data: [seller.trust_score, seller.metrics.delivery, seller.metrics.response, seller.metrics.authenticity],
+            backgroundColor: '#3b82f6',
+            borderRadius: 4
+        }
+    ];
+    // benchmarks is null until the first platform computation has finished
+    if (benchmarks) {
+        datasets.push({
+            label: 'Platform Average',
+            data: [benchmarks.avg_trust_score, benchmarks.avg_delivery, benchmarks.avg_response, benchmarks.avg_authenticity],
+            backgroundColor: '#94a3b8',
+            borderRadius: 4
+        });
+    }
     new Chart(ctx, {
         type: 'bar',
         data: {
             labels: ['Trust Score', 'Delivery', 'Response', 'Authenticity'],
-            datasets: [
-                {
-                    label: 'You',
-                    data: [seller.trust_score, seller.metrics.delivery, seller.metrics.response, seller.metrics.authenticity],
-                    backgroundColor: '#3b82f6',
-                    borderRadius: 4
-                },
-                {
-                    label: 'Platform Average',
-                    data: [benchmarks.avg_trust_score, benchmarks.avg_delivery, benchmarks.avg_response, benchmarks.avg_authenticity],
-                    backgroundColor: '#94a3b8',
-                    borderRadius: 4
-                }
-            ]
+            datasets: datasets
         },
         options: {
             responsive: true,
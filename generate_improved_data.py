@@ -1,108 +1,49 @@
-import csv
-import random
-import datetime
+"""
+Generate sellers, orders and reviews with fake-review patterns.
+
+Columns are drawn with NumPy in chunks and streamed to CSV (or Parquet), so
+memory stays flat however many rows are requested. Ground-truth fake labels
+go to a side file (review_labels.csv / .parquet) that is not part of the
+dataset itself.
+
+Usage:
+    python generate_improved_data.py                          # 20 sellers, 2500 orders, 800 reviews into data/
+    python generate_improved_data.py --sellers 100000 --orders 50000000 --reviews 10000000 --out /tmp/big
+    python generate_improved_data.py --format parquet ...     # needs pyarrow
+"""
+import argparse
 import os
+import time
+import numpy as np
+import pandas as pd
 
 # Configuration
 SELLERS_COUNT = 20
 REVIEWS_COUNT = 800
 ORDERS_COUNT = 2500
 FAKE_REVIEW_PERCENTAGE = 0.12  # 12% of reviews will be fake
+FAKE_SELLER_SHARE = 0.3  # 6 of 20 sellers post fake reviews
+BURST_REVIEW_SHARE = 20 / 800  # extra same-day burst reviews, relative to REVIEWS_COUNT
+CHUNK_SIZE = 1_000_000
 
-SELLER_NAMES = [f"Seller_{i+1}" for i in range(SELLERS_COUNT)]
-
-def random_date(start_year=2023, end_year=2024):
-    start = datetime.date(start_year, 1, 1)
-    end = datetime.date(end_year, 12, 31)
-    return start + datetime.timedelta(days=random.randint(0, (end - start).days))
-
-def random_date_in_range(start_date, days_range=3):
-    """Generate a date within X days of start_date (for burst detection)"""
-    return start_date + datetime.timedelta(days=random.randint(0, days_range))
-
-# Generate Sellers with varying quality tiers
-sellers = []
-sellers_with_fake_reviews = random.sample(range(SELLERS_COUNT), k=6)  # 6 sellers will have fake reviews
-
-for i in range(SELLERS_COUNT):
-    seller_id = i + 1
-    
-    # Create 3 tiers: Good (40%), Average (40%), Poor (20%)
-    tier = random.choices(['good', 'average', 'poor'], weights=[40, 40, 20])[0]
-    
-    if tier == 'good':
-        account_age_days = random.randint(800, 2000)
-        avg_response_time_hours = round(random.uniform(1, 8), 2)
-    elif tier == 'average':
-        account_age_days = random.randint(400, 800)
-        avg_response_time_hours = round(random.uniform(8, 20), 2)
-    else:
-        account_age_days = random.randint(100, 400)
-        avg_response_time_hours = round(random.uniform(20, 48), 2)
-    
-    sellers.append({
-        "seller_id": seller_id,
-        "seller_name": SELLER_NAMES[i],
-        "account_age_days": account_age_days,
-        "avg_response_time_hours": avg_response_time_hours,
-        "tier": tier,
-        "has_fake_reviews": i in sellers_with_fake_reviews
-    })
-
-# Write sellers.csv
-with open("data/sellers.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["seller_id", "seller_name", "account_age_days", "avg_response_time_hours"])
-    writer.writeheader()
-    for seller in sellers:
-        writer.writerow({
-            "seller_id": seller["seller_id"],
-            "seller_name": seller["seller_name"],
-            "account_age_days": seller["account_age_days"],
-            "avg_response_time_hours": seller["avg_response_time_hours"]
-        })
-
-# Generate Orders
-orders = []
-for i in range(ORDERS_COUNT):
-    seller = random.choice(sellers)
-    seller_tier = seller["tier"]
-    
-    order_date = random_date(2023, 2024)
-    
-    if seller_tier == 'good':
-        on_time = 1 if random.random() < 0.90 else 0
-        returned = 1 if random.random() < 0.05 else 0
-    elif seller_tier == 'average':
-        on_time = 1 if random.random() < 0.70 else 0
-        returned = 1 if random.random() < 0.15 else 0
-    else:
-        on_time = 1 if random.random() < 0.40 else 0
-        returned = 1 if random.random() < 0.30 else 0
-    
-    if on_time:
-        delivery_days = random.randint(2, 5)
-    else:
-        delivery_days = random.randint(6, 15)
-    
-    delivered_date = order_date + datetime.timedelta(days=delivery_days)
-    
-    orders.append({
-        "order_id": i + 1,
-        "seller_id": seller["seller_id"],
-        "order_date": order_date.isoformat(),
-        "delivered_date": delivered_date.isoformat(),
-        "delivery_days": delivery_days,
-        "on_time_delivery": on_time,
-        "returned": returned
-    })
+# Tiers: Good (40%), Average (40%), Poor (20%)
+TIERS = ['good', 'average', 'poor']
+TIER_WEIGHTS = [0.4, 0.4, 0.2]
+ACCOUNT_AGE_RANGE = np.array([[800, 2000], [400, 800], [100, 400]])
+RESPONSE_TIME_RANGE = np.array([[1, 8], [8, 20], [20, 48]])
+ON_TIME_RATE = np.array([0.90, 0.70, 0.40])
+RETURN_RATE = np.array([0.05, 0.15, 0.30])
+RATINGS = {
+    'good': ([3, 4, 5], [0.10, 0.30, 0.60]),
+    'average': ([2, 3, 4], [0.20, 0.50, 0.30]),
+    'poor': ([1, 2, 3], [0.40, 0.40, 0.20])
+}
 
-# Write orders.csv
-with open("data/orders.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["order_id", "seller_id", "order_date", "delivered_date", "delivery_days", "on_time_delivery", "returned"])
-    writer.writeheader()
-    writer.writerows(orders)
+START_DATE = np.datetime64("2023-01-01")
+DATE_SPAN_DAYS = 731  # 2023-01-01 .. 2024-12-31
+# Formatted once; every date column is an index into this table
+DATE_STRINGS = np.datetime_as_string(START_DATE + np.arange(DATE_SPAN_DAYS + 15), unit="D").astype(object)
 
-# Generate Reviews with FAKE patterns
 review_texts = {
     'good': [
         "Excellent product and fast delivery.",
@@ -141,126 +82,226 @@ fake_review_patterns = [
     "Excellent! Highly recommended!",
     "Perfect! Will buy again!",
     "Great seller! Fast shipping!",
-    
+
     # Pattern 2: Very short suspicious
     "Good",
     "Nice",
     "Best",
     "Perfect",
-    
+
     # Pattern 3: Overly enthusiastic
     "BEST PRODUCT EVER!!! AMAZING!!!",
     "SUPER GREAT SELLER!!! BUY NOW!!!",
-    
+
     # Pattern 4: Copy-paste duplicates
     "This is the best product I have ever purchased and I highly recommend it to everyone.",
     "Outstanding quality and amazing service from this seller.",
 ]
+# Fake kinds and the slice of fake_review_patterns each draws its text from
+FAKE_KINDS = {
+    'duplicate': slice(8, 10),
+    'generic': slice(4, 8),
+    'burst': slice(0, 4),
+    'suspicious_rating': slice(6, 8)
+}
+LABELS = ['genuine'] + list(FAKE_KINDS)
+
+def pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
 
-reviews = []
-fake_reviews_count = 0
-target_fake_count = int(REVIEWS_COUNT * FAKE_REVIEW_PERCENTAGE)
+class ChunkWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file."""
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._file = None
+        self._parquet = None
 
-for i in range(REVIEWS_COUNT):
-    seller = random.choice(sellers)
-    seller_tier = seller["tier"]
-    
-    # Decide if this should be a fake review
-    is_fake = False
-    if seller["has_fake_reviews"] and fake_reviews_count < target_fake_count:
-        # 30% chance of making it fake if seller is flagged for fakes
-        if random.random() < 0.3:
-            is_fake = True
-            fake_reviews_count += 1
-    
-    review_date = random_date(2023, 2024)
-    
-    if is_fake:
-        # FAKE REVIEW PATTERNS
-        pattern = random.choice(['duplicate', 'generic', 'burst', 'suspicious_rating'])
-        
-        if pattern == 'duplicate':
-            # Use same review text multiple times
-            review_text = random.choice(fake_review_patterns[8:10])
-            rating = 5  # Always 5 stars
-            
-        elif pattern == 'generic':
-            # Very short, generic text
-            review_text = random.choice(fake_review_patterns[4:8])
-            rating = 5
-            
-        elif pattern == 'burst':
-            # Part of a review burst (multiple reviews same day)
-            review_text = random.choice(fake_review_patterns[0:4])
-            rating = 5
-            # Set date to be clustered (handled in burst generation)
-            
-        else:  # suspicious_rating
-            # Overly enthusiastic
-            review_text = random.choice(fake_review_patterns[6:8])
-            rating = 5
-    else:
-        # GENUINE REVIEW
-        if seller_tier == 'good':
-            rating = random.choices([3, 4, 5], weights=[10, 30, 60])[0]
-            review_text = random.choice(review_texts['good'])
-        elif seller_tier == 'average':
-            rating = random.choices([2, 3, 4], weights=[20, 50, 30])[0]
-            review_text = random.choice(review_texts['average'])
+    def write(self, df):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
         else:
-            rating = random.choices([1, 2, 3], weights=[40, 40, 20])[0]
-            review_text = random.choice(review_texts['poor'])
-    
-    reviews.append({
-        "review_id": i + 1,
-        "seller_id": seller["seller_id"],
+            if self._file is None:
+                self._file = open(self.path, "w", newline="")
+                df.to_csv(self._file, index=False)
+            else:
+                df.to_csv(self._file, index=False, header=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+def generate_sellers(rng, n_sellers):
+    """Seller table plus each seller's tier index and whether it posts fake reviews."""
+    tiers = rng.choice(len(TIERS), size=n_sellers, p=TIER_WEIGHTS)
+    ages = ACCOUNT_AGE_RANGE[tiers]
+    response = RESPONSE_TIME_RANGE[tiers]
+    sellers = pd.DataFrame({
+        "seller_id": np.arange(1, n_sellers + 1),
+        "seller_name": np.char.add("Seller_", np.arange(1, n_sellers + 1).astype(str)),
+        "account_age_days": rng.integers(ages[:, 0], ages[:, 1] + 1),
+        "avg_response_time_hours": np.round(rng.uniform(response[:, 0], response[:, 1]), 2)
+    })
+    has_fake = np.zeros(n_sellers, dtype=bool)
+    has_fake[rng.choice(n_sellers, size=int(round(n_sellers * FAKE_SELLER_SHARE)), replace=False)] = True
+    return sellers, tiers, has_fake
+
+def generate_orders(rng, tiers, start_id, n):
+    """One chunk of orders with ids start_id .. start_id + n - 1."""
+    seller = rng.integers(0, len(tiers), n)
+    tier = tiers[seller]
+    on_time = rng.random(n) < ON_TIME_RATE[tier]
+    returned = rng.random(n) < RETURN_RATE[tier]
+    delivery_days = np.where(on_time, rng.integers(2, 6, n), rng.integers(6, 16, n))
+    order_day = rng.integers(0, DATE_SPAN_DAYS, n)
+    return pd.DataFrame({
+        "order_id": np.arange(start_id, start_id + n),
+        "seller_id": seller + 1,
+        "order_date": DATE_STRINGS[order_day],
+        "delivered_date": DATE_STRINGS[order_day + delivery_days],
+        "delivery_days": delivery_days,
+        "on_time_delivery": on_time.astype(np.int8),
+        "returned": returned.astype(np.int8)
+    })
+
+def generate_reviews(rng, tiers, has_fake, start_id, n, fake_budget):
+    """
+    One chunk of reviews. Reviews of fake-posting sellers are fake with 30%
+    probability until fake_budget is spent. Returns (reviews, labels, fakes used).
+    """
+    seller = rng.integers(0, len(tiers), n)
+    tier = tiers[seller]
+    rating = np.empty(n, dtype=np.int64)
+    text = np.empty(n, dtype=object)
+    for t, name in enumerate(TIERS):
+        mask = tier == t
+        count = int(mask.sum())
+        values, weights = RATINGS[name]
+        rating[mask] = rng.choice(values, size=count, p=weights)
+        text[mask] = pick(rng, review_texts[name], count)
+
+    fake = has_fake[seller] & (rng.random(n) < 0.3)
+    fake &= np.cumsum(fake) <= fake_budget
+    kind = np.zeros(n, dtype=np.int8)
+    kind[fake] = rng.integers(1, len(LABELS), int(fake.sum()))
+    for k, label in enumerate(LABELS[1:], start=1):
+        mask = kind == k
+        text[mask] = pick(rng, fake_review_patterns[FAKE_KINDS[label]], int(mask.sum()))
+    rating[fake] = 5  # Always 5 stars
+
+    review_ids = np.arange(start_id, start_id + n)
+    reviews = pd.DataFrame({
+        "review_id": review_ids,
+        "seller_id": seller + 1,
         "rating": rating,
-        "review_text": review_text,
-        "review_date": review_date.isoformat(),
-        "is_fake_label": is_fake  # Ground truth label (not in CSV, just for tracking)
+        "review_text": text,
+        "review_date": DATE_STRINGS[rng.integers(0, DATE_SPAN_DAYS, n)]
+    })
+    labels = pd.DataFrame({
+        "review_id": review_ids,
+        "is_fake": fake.astype(np.int8),
+        "pattern": np.asarray(LABELS, dtype=object)[kind]
+    })
+    return reviews, labels, int(fake.sum())
+
+def generate_bursts(rng, has_fake, start_id, burst_cap):
+    """
+    Bursts of 5-8 identical 5-star reviews on one day, one per fake-posting
+    seller, until burst_cap burst reviews have been added.
+    """
+    burst_sellers = np.flatnonzero(has_fake)
+    sizes = rng.integers(5, 9, len(burst_sellers))
+    # A burst is added while fewer than burst_cap burst reviews exist
+    keep = (np.cumsum(sizes) - sizes) < burst_cap
+    burst_sellers, sizes = burst_sellers[keep], sizes[keep]
+    n = int(sizes.sum())
+    review_ids = np.arange(start_id, start_id + n)
+    reviews = pd.DataFrame({
+        "review_id": review_ids,
+        "seller_id": np.repeat(burst_sellers, sizes) + 1,
+        "rating": np.full(n, 5),
+        "review_text": np.repeat(pick(rng, fake_review_patterns[FAKE_KINDS['burst']], len(sizes)), sizes),
+        "review_date": np.repeat(DATE_STRINGS[rng.integers(0, DATE_SPAN_DAYS, len(sizes))], sizes)
     })
+    labels = pd.DataFrame({"review_id": review_ids, "is_fake": np.ones(n, dtype=np.int8), "pattern": "burst"})
+    return reviews, labels
+
+def generate(out_dir="data", n_sellers=SELLERS_COUNT, n_orders=ORDERS_COUNT, n_reviews=REVIEWS_COUNT,
+             chunk_size=CHUNK_SIZE, fmt="csv", seed=None):
+    """Write sellers, orders, reviews and review_labels to out_dir; returns row counts."""
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    ext = "parquet" if fmt == "parquet" else "csv"
+    writers = {name: ChunkWriter(os.path.join(out_dir, f"{name}.{ext}"), fmt) for name in ("sellers", "orders", "reviews", "review_labels")}
+    try:
+        sellers, tiers, has_fake = generate_sellers(rng, n_sellers)
+        writers["sellers"].write(sellers)
+
+        for start in range(0, n_orders, chunk_size):
+            writers["orders"].write(generate_orders(rng, tiers, start + 1, min(chunk_size, n_orders - start)))
+
+        fake_budget = int(n_reviews * FAKE_REVIEW_PERCENTAGE)
+        fake_count = 0
+        for start in range(0, n_reviews, chunk_size):
+            reviews, labels, used = generate_reviews(rng, tiers, has_fake, start + 1, min(chunk_size, n_reviews - start), fake_budget - fake_count)
+            fake_count += used
+            writers["reviews"].write(reviews)
+            writers["review_labels"].write(labels)
+
+        # Add review BURSTS for some sellers with fake reviews
+        burst_cap = max(20, int(n_reviews * BURST_REVIEW_SHARE))
+        reviews, labels = generate_bursts(rng, has_fake, n_reviews + 1, burst_cap)
+        fake_count += len(reviews)
+        writers["reviews"].write(reviews)
+        writers["review_labels"].write(labels)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {
+        "sellers": writers["sellers"].rows,
+        "orders": writers["orders"].rows,
+        "reviews": writers["reviews"].rows,
+        "fake_reviews": fake_count
+    }
 
-# Add review BURSTS for some sellers with fake reviews
-burst_reviews_added = 0
-for seller in sellers:
-    if seller["has_fake_reviews"] and burst_reviews_added < 20:
-        # Add a burst of 5-8 reviews on same day
-        burst_size = random.randint(5, 8)
-        burst_date = random_date(2023, 2024)
-        burst_text = random.choice(fake_review_patterns[0:4])
-        
-        for j in range(burst_size):
-            reviews.append({
-                "review_id": len(reviews) + 1,
-                "seller_id": seller["seller_id"],
-                "rating": 5,
-                "review_text": burst_text,
-                "review_date": burst_date.isoformat(),
-                "is_fake_label": True
-            })
-            burst_reviews_added += 1
-            fake_reviews_count += 1
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the TrustScore dataset with fake-review patterns")
+    parser.add_argument("--sellers", type=int, default=SELLERS_COUNT)
+    parser.add_argument("--orders", type=int, default=ORDERS_COUNT)
+    parser.add_argument("--reviews", type=int, default=REVIEWS_COUNT)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows generated and written at a time")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", default="data")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
 
-# Write reviews.csv
-with open("data/reviews.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["review_id", "seller_id", "rating", "review_text", "review_date"])
-    writer.writeheader()
-    for review in reviews:
-        writer.writerow({
-            "review_id": review["review_id"],
-            "seller_id": review["seller_id"],
-            "rating": review["rating"],
-            "review_text": review["review_text"],
-            "review_date": review["review_date"]
-        })
+    start = time.perf_counter()
+    counts = generate(args.out, args.sellers, args.orders, args.reviews, args.chunk_size, args.format, args.seed)
+    elapsed = time.perf_counter() - start
+    total_rows = counts["sellers"] + counts["orders"] + counts["reviews"]
 
-print(f"✅ Generated dataset with FAKE REVIEWS:")
-print(f"   - {SELLERS_COUNT} sellers")
-print(f"   - {ORDERS_COUNT} orders")
-print(f"   - {len(reviews)} reviews ({fake_reviews_count} fake, {len(reviews) - fake_reviews_count} genuine)")
-print(f"   - Fake review percentage: {fake_reviews_count/len(reviews)*100:.1f}%")
-print(f"\nFake review patterns included:")
-print(f"   - Review bursts (same day, same text)")
-print(f"   - Duplicate generic reviews")
-print(f"   - Very short suspicious text")
-print(f"   - Overly enthusiastic spam")
+    print(f"✅ Generated dataset with FAKE REVIEWS in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/sec):")
+    print(f"   - {counts['sellers']} sellers")
+    print(f"   - {counts['orders']} orders")
+    print(f"   - {counts['reviews']} reviews ({counts['fake_reviews']} fake, {counts['reviews'] - counts['fake_reviews']} genuine)")
+    print(f"   - Fake review percentage: {counts['fake_reviews']/counts['reviews']*100:.1f}%")
+    print(f"   - Ground truth labels: {os.path.join(args.out, 'review_labels.' + ('parquet' if args.format == 'parquet' else 'csv'))}")
+    print(f"\nFake review patterns included:")
+    print(f"   - Review bursts (same day, same text)")
+    print(f"   - Duplicate generic reviews")
+    print(f"   - Very short suspicious text")
+    print(f"   - Overly enthusiastic spam")
@@ -1,65 +1,203 @@
-import pandas as pd
+"""
+Bulk-load data/*.csv into Supabase (or a local SQLite stand-in).
+
+Each CSV is streamed in chunks and its types converted column-wise. Batches
+are upserted concurrently with at most --in-flight requests outstanding, and
+failed batches are retried with exponential backoff. Progress is checkpointed
+per table (the last batch below which every batch has committed), so an
+interrupted run resumes where it stopped; upserts make replaying a few
+batches harmless.
+
+Usage:
+    python seed_supabase.py                          # data/ into Supabase
+    python seed_supabase.py --data-dir /tmp/big --batch-size 2000 --in-flight 16
+    python seed_supabase.py --target sqlite          # into SQLITE_PATH instead
+    python seed_supabase.py --restart                # ignore the checkpoint
+"""
+import argparse
+import json
 import os
-from backend.supabase_client import get_supabase_admin
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+import pandas as pd
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+TABLES = ("sellers", "orders", "reviews")
+
+BATCH_SIZE = 1000
+IN_FLIGHT = 8
+CHUNK_ROWS = 100_000
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+CHECKPOINT_FILE = ".seed_checkpoint.json"
+
+# Column types as sent to the database: TEXT ids, ISO dates, BOOLEAN flags
+TEXT_COLUMNS = {"seller_id", "seller_name", "order_id", "review_id", "review_text", "user_id"}
+DATE_COLUMNS = {"order_date", "delivered_date", "review_date"}
+BOOL_COLUMNS = {"on_time_delivery", "returned", "flagged_fake"}
+
+class SupabaseTarget:
+    name = "supabase"
+
+    def __init__(self):
+        from backend.supabase_client import get_supabase_admin
+        self.client = get_supabase_admin()
+
+    def upsert(self, table, rows):
+        self.client.table(table).upsert(rows).execute()
+
+class SQLiteTarget:
+    """Local stand-in: the SQLite database used by DATA_SOURCE=sqlite."""
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        from backend.data_sources import SQLiteSource, SQLITE_PATH
+        self.source = SQLiteSource(path=path or SQLITE_PATH, data_dir=None)
+        self.conn = self.source.connection()
+        self._lock = threading.Lock()
+
+    def upsert(self, table, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self._lock, self.conn:
+            self.conn.executemany(sql, [tuple(row[c] for c in columns) for row in rows])
+
+class Checkpoint:
+    """Per-table count of committed batches, stored as JSON next to the data."""
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
 
-def seed_sellers():
-    print("Seeding sellers...")
-    df = pd.read_csv(os.path.join(DATA_DIR, "sellers.csv"))
-    # Rename columns to match SQL schema
-    df = df.rename(columns={
-        "seller_name": "seller_name",
-        "avg_response_time_hours": "avg_response_time_hours"
-    })
-    data = df.to_dict(orient="records")
-    supabase = get_supabase_admin()
-    for row in data:
-        supabase.table("sellers").upsert(row).execute()
-    print(f"Seeded {len(data)} sellers.")
-
-def seed_orders():
-    print("Seeding orders...")
-    df = pd.read_csv(os.path.join(DATA_DIR, "orders.csv"))
-    # Handle dates and booleans
-    df['order_date'] = pd.to_datetime(df['order_date']).dt.strftime('%Y-%m-%d')
-    df['delivered_date'] = pd.to_datetime(df['delivered_date']).dt.strftime('%Y-%m-%d')
-    df['on_time_delivery'] = df['on_time_delivery'].astype(bool)
-    df['returned'] = df['returned'].astype(bool)
-    
-    data = df.to_dict(orient="records")
-    supabase = get_supabase_admin()
-    
-    # Supabase might have limits on batch size, but 2500 should be okay or split
-    batch_size = 500
-    for i in range(0, len(data), batch_size):
-        batch = data[i:i + batch_size]
-        supabase.table("orders").upsert(batch).execute()
-    print(f"Seeded {len(data)} orders.")
-
-def seed_reviews():
-    print("Seeding reviews...")
-    df = pd.read_csv(os.path.join(DATA_DIR, "reviews.csv"))
-    df['review_date'] = pd.to_datetime(df['review_date']).dt.strftime('%Y-%m-%d')
-    
-    data = df.to_dict(orient="records")
-    supabase = get_supabase_admin()
-    
-    batch_size = 500
-    for i in range(0, len(data), batch_size):
-        batch = data[i:i + batch_size]
-        supabase.table("reviews").upsert(batch).execute()
-    print(f"Seeded {len(data)} reviews.")
-
-def seed_users():
+    def committed(self, table, source):
+        entry = self.state.get(table)
+        if entry and entry["source"] == source:
+            return entry["batches"], entry.get("done", False)
+        return 0, False
+
+    def save(self, table, source, batches, done=False):
+        self.state[table] = {"source": source, "batches": batches, "done": done}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+def source_signature(path, batch_size):
+    # A changed file or batch size invalidates the batch numbering
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}:{batch_size}"
+
+def prepare_chunk(df):
+    """Convert one CSV chunk to JSON-ready rows, column by column."""
+    for column in df.columns:
+        if column in DATE_COLUMNS:
+            df[column] = pd.to_datetime(df[column], format="ISO8601").dt.strftime("%Y-%m-%d")
+        elif column in BOOL_COLUMNS:
+            df[column] = df[column].astype("boolean")
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+def read_batches(path, batch_size, chunk_rows, skip_batches=0):
+    """Yield (batch_index, rows) from the CSV, skipping already committed batches."""
+    skip_rows = skip_batches * batch_size
+    dtype = {c: str for c in TEXT_COLUMNS}
+    chunk_rows = max(batch_size, chunk_rows - chunk_rows % batch_size)  # whole batches per chunk
+    index = skip_batches
+    reader = pd.read_csv(path, dtype=dtype, chunksize=chunk_rows, skiprows=range(1, skip_rows + 1))
+    for chunk in reader:
+        rows = prepare_chunk(chunk)
+        for start in range(0, len(rows), batch_size):
+            yield index, rows[start:start + batch_size]
+            index += 1
+
+def send_with_retry(target, table, rows, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+    for attempt in range(retries + 1):
+        try:
+            target.upsert(table, rows)
+            return len(rows)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            print(f"  {table}: batch failed ({e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+def bulk_seed(table, target, data_dir=DATA_DIR, batch_size=BATCH_SIZE, in_flight=IN_FLIGHT,
+              chunk_rows=CHUNK_ROWS, checkpoint=None, retries=MAX_RETRIES):
+    """Upsert <data_dir>/<table>.csv into `table`; returns rows sent in this run."""
+    path = os.path.join(data_dir, f"{table}.csv")
+    source = source_signature(path, batch_size)
+    committed, done = checkpoint.committed(table, source) if checkpoint else (0, False)
+    if done:
+        print(f"Skipping {table}: already seeded (checkpoint)")
+        return 0
+    if committed:
+        print(f"Resuming {table} after batch {committed} ({committed * batch_size} rows)")
+    else:
+        print(f"Seeding {table}...")
+
+    start = time.perf_counter()
+    sent = 0
+    finished = set()
+    last_report = start
+    last_save = start
+    futures = {}
+    with ThreadPoolExecutor(max_workers=in_flight) as pool:
+        def collect(block):
+            nonlocal sent, committed, last_report, last_save
+            done_futures, _ = wait(futures, return_when=FIRST_COMPLETED if block else ALL_COMPLETED)
+            for future in done_futures:
+                index = futures.pop(future)
+                sent += future.result()  # re-raises after the retries are exhausted
+                finished.add(index)
+            # Advance the checkpoint over the contiguous prefix of finished batches
+            advanced = committed
+            while advanced in finished:
+                finished.remove(advanced)
+                advanced += 1
+            now = time.perf_counter()
+            if advanced != committed:
+                committed = advanced
+                if checkpoint and now - last_save >= 1:
+                    last_save = now
+                    checkpoint.save(table, source, committed)
+            if now - last_report >= 5:
+                last_report = now
+                print(f"  {table}: {sent} rows, {sent / (now - start):,.0f} rows/sec")
+
+        try:
+            for index, rows in read_batches(path, batch_size, chunk_rows, committed):
+                # Bounded window: at most in_flight batches queued or running
+                if len(futures) >= in_flight:
+                    collect(block=True)
+                futures[pool.submit(send_with_retry, target, table, rows, retries)] = index
+            while futures:
+                collect(block=False)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            if checkpoint:
+                checkpoint.save(table, source, committed)
+            raise
+
+    if checkpoint:
+        checkpoint.save(table, source, committed, done=True)
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {sent} {table} in {elapsed:.1f}s ({sent / elapsed if elapsed > 0 else 0:,.0f} rows/sec)")
+    return sent
+
+def seed_users(target):
     print("Seeding demo users...")
     import bcrypt
-    
-    supabase = get_supabase_admin()
-    
+
     # Admin User
     admin_data = {
         "username": "admin_demo",
@@ -67,8 +205,8 @@ def seed_users():
         "password_hash": bcrypt.hashpw("Admin@123".encode(), bcrypt.gensalt()).decode(),
         "role": "admin"
     }
-    supabase.table("users").upsert(admin_data).execute()
-    
+    target.upsert("users", [admin_data])
+
     # Seller User (tied to Seller_1 / id 1)
     seller_data = {
         "username": "seller_alpha",
@@ -77,15 +215,35 @@ def seed_users():
         "role": "seller",
         "seller_id": "1"
     }
-    supabase.table("users").upsert(seller_data).execute()
+    target.upsert("users", [seller_data])
     print("Seeded demo users.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load the CSV dataset into Supabase or SQLite")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--target", choices=["supabase", "sqlite"], default="supabase")
+    parser.add_argument("--sqlite-path", help="SQLite file for --target sqlite (default SQLITE_PATH)")
+    parser.add_argument("--tables", default=",".join(TABLES))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--in-flight", type=int, default=IN_FLIGHT, help="concurrent batches")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="CSV rows parsed at a time")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and reload everything")
+    parser.add_argument("--skip-users", action="store_true")
+    args = parser.parse_args()
+
     try:
-        seed_sellers()
-        seed_orders()
-        seed_reviews()
-        seed_users()
+        target = SQLiteTarget(args.sqlite_path) if args.target == "sqlite" else SupabaseTarget()
+        checkpoint_path = os.path.join(args.data_dir, CHECKPOINT_FILE)
+        if args.restart and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoint = Checkpoint(checkpoint_path)
+        # Parents first: orders and reviews reference sellers
+        for table in [t for t in TABLES if t in args.tables.split(",")]:
+            bulk_seed(table, target, args.data_dir, args.batch_size, args.in_flight,
+                      args.chunk_rows, checkpoint, args.retries)
+        if not args.skip_users:
+            seed_users(target)
         print("Database seeding completed successfully!")
     except Exception as e:
         print(f"Error seeding database: {e}")
@@ -0,0 +1,41 @@
+"""
+Train the review anomaly model offline and persist it for the API.
+
+The FastAPI app loads the file once at startup (ANOMALY_MODEL_PATH, default
+models/review_anomaly.joblib); without it the anomaly stage is skipped.
+
+Usage:
+    python train_anomaly_model.py            # train on Supabase data
+    python train_anomaly_model.py --csv      # train on data/*.csv
+"""
+import argparse
+import os
+import time
+from backend.data_loader import load_data, load_csv_data
+from backend.model import ReviewAnomalyModel, ANOMALY_FEATURES
+
+DEFAULT_PATH = os.getenv("ANOMALY_MODEL_PATH", os.path.join(os.path.dirname(__file__), "models", "review_anomaly.joblib"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the review anomaly IsolationForest")
+    parser.add_argument("--csv", action="store_true", help="train on data/*.csv instead of Supabase")
+    parser.add_argument("--contamination", type=float, default=0.01)
+    parser.add_argument("--estimators", type=int, default=100)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    data = load_csv_data() if args.csv else load_data(full=True)
+    if data is None:
+        raise SystemExit("Failed to load data")
+    reviews = data['reviews']
+
+    print(f"Training on {len(reviews)} reviews, features: {', '.join(ANOMALY_FEATURES)}")
+    start = time.perf_counter()
+    model = ReviewAnomalyModel().fit(reviews, contamination=args.contamination, n_estimators=args.estimators)
+    print(f"Trained in {time.perf_counter() - start:.2f}s")
+
+    model.save(args.output)
+    flagged = model.detect(reviews)
+    print(f"Saved model to {args.output}")
+    print(f"Training set anomalies: {len(flagged)} ({len(flagged)/max(len(reviews), 1)*100:.2f}%)")
@@ -0,0 +1,157 @@
+"""
+Regression check: the grouped TrustScoreEngine.calculate_scores must return
+exactly what the per-seller reference loop returns.
+
+Runs against the local data/*.csv files, so no Supabase access is needed.
+Usage: python verify_scores.py
+"""
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+from backend.data_loader import load_csv_data, persist_review_flags, compact_frame
+from backend.snapshot_store import save_snapshot, load_snapshot
+from backend.data_sources import SQLiteSource
+from backend.trust_engine import TrustScoreEngine, score_seller_stats
+from backend.incremental_scores import IncrementalScoreEngine
+
+def compare(label, engine):
+    start = time.perf_counter()
+    fast = engine.calculate_scores()
+    fast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = engine.calculate_scores_iterative()
+    ref_time = time.perf_counter() - start
+
+    # repr() also catches int/float/np.float64 type drift, not just value drift
+    ok = repr(fast) == repr(reference)
+    print(f"[{'OK' if ok else 'MISMATCH'}] {label}: {len(fast)} sellers, "
+          f"grouped {fast_time*1000:.1f} ms vs reference {ref_time*1000:.1f} ms")
+    if not ok:
+        for a, b in zip(fast, reference):
+            if repr(a) != repr(b):
+                print(f"   first difference:\n   grouped:   {a}\n   reference: {b}")
+                break
+    return ok
+
+def compare_seller_stats(label, data):
+    """
+    Scores from the seller_stats view alone must equal the row-based scores.
+    reviews.flagged_fake is written the way load_data() does it
+    (persist_review_flags), starting from stale flags that must be cleared.
+    Compared by value: the view's std is rebuilt from sums of squares.
+    """
+    engine = TrustScoreEngine(data)
+    source = SQLiteSource(path=":memory:")
+    conn = source.connection()
+    with conn:
+        conn.execute("UPDATE reviews SET flagged_fake = 1 WHERE CAST(review_id AS INTEGER) % 7 = 0")
+    persist_review_flags(source)
+
+    start = time.perf_counter()
+    stats = source.fetch_seller_stats()
+    from_stats = score_seller_stats(stats)
+    stats_time = time.perf_counter() - start
+    reference = sorted(engine.calculate_scores(), key=lambda s: s['seller_id'])
+
+    ok = from_stats == reference
+    print(f"[{'OK' if ok else 'MISMATCH'}] {label}: {len(from_stats)} sellers from {len(stats)} view rows "
+          f"in {stats_time*1000:.1f} ms")
+    if not ok:
+        for a, b in zip(from_stats, reference):
+            if a != b:
+                print(f"   first difference:\n   view:      {a}\n   reference: {b}")
+                break
+    return ok
+
+def compare_incremental(label, data):
+    """
+    Replaying every order and review as a single event into an
+    IncrementalScoreEngine must end at the batch scores (compared by value:
+    the rating std is rebuilt from sums of squares).
+    """
+    engine = TrustScoreEngine(data)
+    reference = engine.calculate_scores()
+
+    start = time.perf_counter()
+    live = IncrementalScoreEngine()
+    live.upsert_sellers(engine.sellers)
+    for order in engine.orders.to_dict(orient="records"):
+        live.add_order(order['seller_id'], order['on_time_delivery'], order['returned'], order['delivery_days'])
+    for review in engine.reviews.to_dict(orient="records"):
+        live.add_review(review['seller_id'], review['rating'], suspicious=review['review_id'] in engine.suspicious_reviews)
+    replay_time = time.perf_counter() - start
+
+    report = live.check(reference)
+    events = len(engine.orders) + len(engine.reviews)
+    print(f"[{'OK' if report['ok'] else 'MISMATCH'}] {label}: {report['sellers']} sellers after {events} events "
+          f"in {replay_time*1000:.1f} ms ({replay_time / max(events, 1) * 1e6:.1f} us/event)")
+    for example in report["examples"][:3]:
+        print(f"   {example}")
+    return report["ok"]
+
+def compare_snapshot_round_trip(label, data):
+    """
+    Scores from tables read back from a local snapshot (and compacted, as a
+    warm start does) must equal the scores of the tables that were saved,
+    including flag columns that hold NULLs.
+    """
+    data = dict(data)
+    orders = data["orders"].copy()
+    for column, step in (("on_time_delivery", 50), ("returned", 40)):
+        orders[column] = orders[column].astype(object)
+        orders.loc[::step, column] = None
+    data["orders"] = orders
+    reference = sorted(TrustScoreEngine(data).calculate_scores(), key=lambda s: s['seller_id'])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot")
+        start = time.perf_counter()
+        save_snapshot({table: data[table] for table in ("sellers", "orders", "reviews")}, path=path)
+        frames, _ = load_snapshot(path, mmap=False)
+        frames = {table: compact_frame(table, df) for table, df in frames.items()}
+        round_trip_time = time.perf_counter() - start
+        loaded = sorted(TrustScoreEngine(frames).calculate_scores(), key=lambda s: s['seller_id'])
+
+    ok = loaded == reference
+    print(f"[{'OK' if ok else 'MISMATCH'}] {label}: {len(loaded)} sellers, "
+          f"{int(orders['on_time_delivery'].isna().sum() + orders['returned'].isna().sum())} NULL flags, "
+          f"round trip {round_trip_time*1000:.1f} ms")
+    if not ok:
+        for a, b in zip(loaded, reference):
+            if a != b:
+                print(f"   first difference:\n   snapshot:  {a}\n   reference: {b}")
+                break
+    return ok
+
+if __name__ == "__main__":
+    data = load_csv_data()
+    results = [compare("supabase-shaped data", TrustScoreEngine(data))]
+
+    # Fallback path: no on_time_delivery column, delivery_days only
+    engine = TrustScoreEngine(data)
+    engine.orders = engine.orders.drop(columns=['on_time_delivery'])
+    results.append(compare("delivery_days fallback", engine))
+
+    # Seller without any orders or reviews
+    engine = TrustScoreEngine(data)
+    engine.sellers = pd.concat([engine.sellers, pd.DataFrame([{
+        "seller_id": "999", "seller_name": "Seller_999",
+        "account_age_days": 10, "avg_response_time_hours": 30.0
+    }])], ignore_index=True)
+    results.append(compare("seller without activity", engine))
+
+    # Order aggregates pushed down to SQLite instead of raw order rows;
+    # the reference loop still reads the raw rows
+    order_stats = SQLiteSource(path=":memory:").fetch_seller_aggregates()
+    engine = TrustScoreEngine({"sellers": data["sellers"], "reviews": data["reviews"], "order_stats": order_stats})
+    engine.orders = data["orders"]
+    results.append(compare("sqlite order aggregates", engine))
+
+    results.append(compare_seller_stats("seller_stats view", data))
+    results.append(compare_incremental("incremental events", data))
+    results.append(compare_snapshot_round_trip("snapshot with NULL flags", data))
+
+    sys.exit(0 if all(results) else 1)